@@ -0,0 +1,55 @@
+import argparse
+import json
+import sys
+from benchmark.generators import GENERATORS, SUITES
+from benchmark.runner import INPUTS, compare, format_result, run_suite
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmark")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run a benchmark suite and write JSON results")
+    run.add_argument("--suite", choices=sorted(SUITES), default="quick")
+    run.add_argument("--case", action="append", choices=sorted(GENERATORS), dest="cases")
+    run.add_argument("--input", choices=sorted(INPUTS), default="nquads")
+    run.add_argument("--hash-algorithm", default="sha256")
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--output", "-o", help="JSON file (default: stdout)")
+
+    diff = commands.add_parser("compare", help="report regressions between two JSON results")
+    diff.add_argument("old")
+    diff.add_argument("new")
+    diff.add_argument("--threshold", type=float, default=0.1)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.old, "r", encoding="utf-8") as f:
+            old = json.load(f)
+        with open(args.new, "r", encoding="utf-8") as f:
+            new = json.load(f)
+        regressions = compare(old, new, args.threshold)
+        for regression in regressions:
+            print(regression)
+        return 1 if regressions else 0
+
+    report = run_suite(
+        args.suite,
+        args.cases,
+        args.input,
+        args.hash_algorithm,
+        args.repeat,
+        on_result=lambda result: print(format_result(result), file=sys.stderr),
+    )
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
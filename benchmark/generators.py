@@ -0,0 +1,109 @@
+from typing import Iterator
+
+
+EX = "http://example.org/"
+
+
+def iri(local: str) -> str:
+    return f"<{EX}{local}>"
+
+
+def quad(s: str, p: str, o: str, g: str = "") -> str:
+    return f"{s} {p} {o} {g} .\n" if g else f"{s} {p} {o} .\n"
+
+
+def chain(length: int = 100, chains: int = 1) -> Iterator[str]:
+    # _:n0 -> _:n1 -> ... ; only the ends differ, so most nodes need n-degree hashing.
+    # n-degree hashing recurses along the chain, so keep length within a few hundred.
+    for c in range(chains):
+        for i in range(length - 1):
+            yield quad(f"_:c{c}n{i}", iri("next"), f"_:c{c}n{i + 1}")
+
+
+def star(leaves: int = 1000, distinct: bool = True) -> Iterator[str]:
+    for i in range(leaves):
+        yield quad("_:center", iri("edge"), f"_:leaf{i}")
+        if distinct:
+            yield quad(f"_:leaf{i}", iri("value"), f'"{i}"')
+
+
+def clique(size: int = 6) -> Iterator[str]:
+    for i in range(size):
+        for j in range(size):
+            yield quad(f"_:e{i}", iri("p"), f"_:e{j}")
+
+
+def ring(size: int = 100, rings: int = 1) -> Iterator[str]:
+    # Every node has the same first-degree hash; the shape of the W3C poison tests.
+    for r in range(rings):
+        for i in range(size):
+            yield quad(f"_:r{r}n{i}", iri("p"), f"_:r{r}n{(i + 1) % size}")
+
+
+def ground(quads: int = 100000) -> Iterator[str]:
+    for i in range(quads):
+        yield quad(iri(f"s{i // 10}"), iri(f"p{i % 10}"), f'"value {i}"')
+
+
+def named_graphs(graphs: int = 1000, quads_per_graph: int = 10) -> Iterator[str]:
+    for g in range(graphs):
+        graph = f"_:g{g}" if g % 2 else iri(f"graph/{g}")
+        for i in range(quads_per_graph):
+            yield quad(f"_:s{g}", iri(f"p{i}"), f'"{g}-{i}"', graph)
+
+
+def credentials(documents: int = 100) -> Iterator[str]:
+    # Verifiable-credential-shaped documents: the credential, its subject and its proof
+    # are blank nodes, and the proof lives in its own blank-node-named graph.
+    for d in range(documents):
+        credential = f"_:vc{d}"
+        subject = f"_:subject{d}"
+        proof_graph = f"_:proofs{d}"
+        proof = f"_:proof{d}"
+        yield quad(credential, iri("type"), iri("VerifiableCredential"))
+        yield quad(credential, iri("issuer"), iri(f"issuers/{d % 7}"))
+        yield quad(credential, iri("issuanceDate"), '"2024-01-01T00:00:00Z"^^<http://www.w3.org/2001/XMLSchema#dateTime>')
+        yield quad(credential, iri("credentialSubject"), subject)
+        yield quad(subject, iri("name"), f'"Holder {d}"@en')
+        yield quad(subject, iri("degree"), f"_:degree{d}")
+        yield quad(f"_:degree{d}", iri("type"), iri("BachelorDegree"))
+        yield quad(credential, iri("proof"), proof_graph)
+        yield quad(proof, iri("type"), iri("DataIntegrityProof"), proof_graph)
+        yield quad(proof, iri("created"), '"2024-01-01T00:00:00Z"', proof_graph)
+        yield quad(proof, iri("proofValue"), f'"z{d:08x}"', proof_graph)
+
+
+GENERATORS = {
+    "chain": chain,
+    "star": star,
+    "clique": clique,
+    "ring": ring,
+    "ground": ground,
+    "named_graphs": named_graphs,
+    "credentials": credentials,
+}
+
+SUITES = {
+    "quick": [
+        ("chain", {"length": 20, "chains": 10}),
+        ("star", {"leaves": 200}),
+        ("clique", {"size": 4}),
+        ("ring", {"size": 20, "rings": 2}),
+        ("ground", {"quads": 10000}),
+        ("named_graphs", {"graphs": 100, "quads_per_graph": 10}),
+        ("credentials", {"documents": 50}),
+    ],
+    "full": [
+        ("chain", {"length": 100, "chains": 20}),
+        ("star", {"leaves": 5000}),
+        ("clique", {"size": 6}),
+        ("ring", {"size": 100, "rings": 4}),
+        ("ground", {"quads": 200000}),
+        ("named_graphs", {"graphs": 2000, "quads_per_graph": 10}),
+        ("credentials", {"documents": 1000}),
+    ],
+}
+
+
+def generate(name: str, **params) -> bytes:
+    return "".join(GENERATORS[name](**params)).encode("utf-8")
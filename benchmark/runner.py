@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from rdfcanon.identifier_issuer import IdentifierIssuer
+from rdfcanon.main import RDFCanon
+from rdfcanon.nquads_custom_parser import parse_nquads_preserve_bnodes
+from benchmark.generators import SUITES, generate
+
+
+PHASES = (
+    "issueSimpleIds",
+    "issue_n_degree_ids",
+    "make_canon_labels",
+    "make_canon_quads",
+)
+INPUTS = {"nquads": "load_nquads", "dataset": "init_blank_id_quad_map"}
+
+
+def timed(timings: dict[str, float], name: str, method):
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
+
+    return wrapper
+
+
+def counted_copies(counts: dict[str, int], unshare):
+    # unshare only copies while another issuer shares the map, so compare before/after.
+    def wrapper(issuer: IdentifierIssuer):
+        existing = issuer.existing
+        unshare(issuer)
+        if issuer.existing is not existing:
+            counts["label_copies"] = counts.get("label_copies", 0) + 1
+            counts["label_entries_copied"] = (
+                counts.get("label_entries_copied", 0) + len(existing)
+            )
+
+    return wrapper
+
+
+def load_input(data: bytes, input: str):
+    if input == "nquads":
+        return data
+
+    fd, path = tempfile.mkstemp(prefix="rdfcanon-bench-", suffix=".nq")
+    try:
+        with open(fd, "wb") as f:
+            f.write(data)
+        return parse_nquads_preserve_bnodes(path)
+    finally:
+        os.remove(path)
+
+
+def canonize_once(source, input: str, hash_algorithm: str) -> tuple[RDFCanon, str, dict[str, float]]:
+    timings: dict[str, float] = dict()
+    canon = RDFCanon(hash_algorithm, dataset=source if input == "dataset" else None)
+    # Instance attributes shadow the methods, so internal calls are timed too.
+    for name in (INPUTS[input],) + PHASES:
+        setattr(canon, name, timed(timings, name, getattr(canon, name)))
+
+    started = time.perf_counter()
+    if input == "nquads":
+        canon.load_nquads(source)
+    output = canon.canonize()
+    timings["total"] = time.perf_counter() - started
+    return canon, output, timings
+
+
+def run_case(
+    name: str,
+    params: dict,
+    input: str = "nquads",
+    hash_algorithm: str = "sha256",
+    repeat: int = 3,
+) -> dict:
+    source = load_input(generate(name, **params), input)
+
+    best: dict[str, float] = dict()
+    for _ in range(repeat):
+        canon, output, timings = canonize_once(source, input, hash_algorithm)
+        for phase, seconds in timings.items():
+            best[phase] = min(seconds, best.get(phase, seconds))
+
+    # Copy-on-write issuers copy their label map in unshare, on the first write while
+    # the map is still shared; the entries copied are what those copies cost.
+    counts: dict[str, int] = dict()
+    unshare = IdentifierIssuer.unshare
+    IdentifierIssuer.unshare = counted_copies(counts, unshare)
+    tracemalloc.start()
+    try:
+        canonize_once(source, input, hash_algorithm)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        IdentifierIssuer.unshare = unshare
+
+    return {
+        "name": name,
+        "params": params,
+        "quads": len(canon.store),
+        "blank_nodes": canon.store.blank_count,
+        "n_degree_calls": canon.work.n_degree_calls,
+        "permutations": canon.work.permutations,
+        "permutations_pruned": canon.work.permutations_pruned,
+        "n_degree_cache_hits": canon.work.n_degree_cache_hits,
+        "bytes_hashed": canon.digest.bytes_hashed,
+        "output_sha256": hashlib.sha256(output.encode("utf-8")).hexdigest(),
+        "seconds": {phase: best.get(phase, 0.0) for phase in (INPUTS[input],) + PHASES + ("total",)},
+        "peak_memory": peak_memory,
+        "label_copies": counts.get("label_copies", 0),
+        "label_entries_copied": counts.get("label_entries_copied", 0),
+    }
+
+
+def commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(
+    suite: str = "quick",
+    cases: list[str] = None,
+    input: str = "nquads",
+    hash_algorithm: str = "sha256",
+    repeat: int = 3,
+    on_result=None,
+) -> dict:
+    results = []
+    for name, params in SUITES[suite]:
+        if cases and name not in cases:
+            continue
+        result = run_case(name, params, input, hash_algorithm, repeat)
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
+
+    return {
+        "suite": suite,
+        "input": input,
+        "hash_algorithm": hash_algorithm,
+        "repeat": repeat,
+        "commit": commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def case_key(result: dict) -> str:
+    return f"{result['name']} {json.dumps(result['params'], sort_keys=True)}"
+
+
+def compare(old: dict, new: dict, threshold: float = 0.1, min_seconds: float = 0.001) -> list[str]:
+    # Regressions of new against old: phases slower by more than threshold (ignoring
+    # phases under min_seconds), more peak memory, or a different canonical output.
+    old_results = {case_key(result): result for result in old["results"]}
+    regressions = []
+    for result in new["results"]:
+        key = case_key(result)
+        before = old_results.get(key)
+        if before is None:
+            continue
+
+        if result["output_sha256"] != before["output_sha256"]:
+            regressions.append(f"{key}: canonical output changed")
+
+        for phase, seconds in result["seconds"].items():
+            previous = before["seconds"].get(phase)
+            if previous is None or max(previous, seconds) < min_seconds:
+                continue
+            if seconds > previous * (1 + threshold):
+                regressions.append(
+                    f"{key}: {phase} {previous * 1000:.2f}ms -> {seconds * 1000:.2f}ms"
+                )
+
+        if result["peak_memory"] > before["peak_memory"] * (1 + threshold):
+            regressions.append(
+                f"{key}: peak_memory {before['peak_memory']} -> {result['peak_memory']}"
+            )
+
+        for counter in ("label_copies", "label_entries_copied"):
+            previous = before.get(counter)
+            if previous is not None and result[counter] > previous * (1 + threshold):
+                regressions.append(f"{key}: {counter} {previous} -> {result[counter]}")
+    return regressions
+
+
+def format_result(result: dict) -> str:
+    phases = " ".join(
+        f"{phase}={seconds * 1000:.1f}ms" for phase, seconds in result["seconds"].items()
+    )
+    return (
+        f"{case_key(result)}: quads={result['quads']} blank_nodes={result['blank_nodes']} "
+        f"{phases} peak_memory={result['peak_memory'] / 2**20:.1f}MiB "
+        f"label_copies={result['label_copies']} "
+        f"label_entries_copied={result['label_entries_copied']}"
+    )
@@ -1,2 +1,15 @@
 from .main import RDFCanon
-from .rdfcanon_time_ticker import RDFCanonTimeTicker
\ No newline at end of file
+from .aio import RDFCanonAsync, canonize_async
+from .batch import RDFCanonBatch, RDFCanonBatchStats, canonize_many
+from .cache import RDFCanonCache, RDFCanonMemoryCache, RDFCanonSqliteCache
+from .incremental import RDFCanonIncremental
+from .isomorphism import isomorphic
+from .rdfcanon_stats import RDFCanonHooks, RDFCanonStats
+from .rdfcanon_time_ticker import RDFCanonTimeTicker
+from .rdfcanon_work_budget import (
+    RDFCanonAborted,
+    RDFCanonCancellationToken,
+    RDFCanonCancelled,
+    RDFCanonLimitExceeded,
+    RDFCanonWorkBudget,
+)
@@ -0,0 +1,147 @@
+import asyncio
+import multiprocessing
+import threading
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor
+from rdflib import Dataset
+from rdfcanon.batch import BatchInput, dataset_terms, load_item
+from rdfcanon.main import RDFCanon
+from rdfcanon.rdfcanon_work_budget import (
+    RDFCanonCancellationToken,
+    RDFCanonEventCancellationToken,
+    RDFCanonWorkBudget,
+)
+
+
+# One default runner per event loop, so canonize_async shares its semaphore and pool.
+_runners: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, RDFCanonAsync]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def canonize_job(hash_algorithm: str, budget: RDFCanonWorkBudget, item) -> str:
+    canon = RDFCanon(hash_algorithm, budget=budget)
+    load_item(canon, item)
+    return canon.canonize()
+
+
+class RDFCanonAsync:
+    EXECUTOR_TYPES = RDFCanon.EXECUTOR_TYPES
+
+    def __init__(
+        self,
+        hash_algorithm: str = "sha256",
+        workers: int = None,
+        executor: Executor = None,
+        executor_type: str = "process",
+        max_concurrency: int = None,
+        budget: RDFCanonWorkBudget = None,
+    ):
+        if executor_type not in self.EXECUTOR_TYPES:
+            raise ValueError(f"Unknown executor type {executor_type!r}")
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency must be positive")
+
+        self.hash_algorithm = hash_algorithm
+        self.workers = workers
+        self.executor = executor
+        self.executor_type = executor_type
+        self.owns_executor = False
+        # Bounds running and queued work alike, so a burst cannot flood the pool.
+        self.max_concurrency = max_concurrency or workers or multiprocessing.cpu_count()
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.budget = budget if budget is not None else RDFCanonWorkBudget()
+        self.manager = None
+        self.manager_lock = threading.Lock()
+
+    def get_executor(self) -> Executor:
+        if self.executor is None:
+            self.executor = self.EXECUTOR_TYPES[self.executor_type](self.workers)
+            self.owns_executor = True
+        return self.executor
+
+    def new_event(self):
+        # Runs in a thread: starting the manager and Event() block on its process.
+        with self.manager_lock:
+            if self.manager is None:
+                self.manager = multiprocessing.Manager()
+            return self.manager.Event()
+
+    async def new_token(self) -> RDFCanonCancellationToken:
+        # Plain tokens do not cross process boundaries.
+        if not isinstance(self.get_executor(), ProcessPoolExecutor):
+            return RDFCanonCancellationToken()
+        event = await asyncio.get_running_loop().run_in_executor(None, self.new_event)
+        return RDFCanonEventCancellationToken(event)
+
+    def job_budget(self, token: RDFCanonCancellationToken) -> RDFCanonWorkBudget:
+        # The caller's limits with a token of our own; cancel the task to stop the work.
+        budget = self.budget
+        return RDFCanonWorkBudget(
+            max_n_degree_calls=budget.max_n_degree_calls,
+            max_recursion_depth=budget.max_recursion_depth,
+            max_permutations=budget.max_permutations,
+            cancellation_token=token,
+            check_interval=budget.check_mask + 1,
+        )
+
+    async def canonize(
+        self, source: BatchInput, timeout: float = None, hash_algorithm: str = None
+    ) -> str:
+        # The timeout covers waiting for a slot as well as the work itself.
+        return await asyncio.wait_for(
+            self.run(source, hash_algorithm or self.hash_algorithm), timeout
+        )
+
+    async def run(self, source: BatchInput, hash_algorithm: str) -> str:
+        if isinstance(source, Dataset):
+            source = dataset_terms(source)
+
+        async with self.semaphore:
+            token = await self.new_token()
+            future = self.get_executor().submit(
+                canonize_job, hash_algorithm, self.job_budget(token), source
+            )
+            waiter = asyncio.wrap_future(future)
+            try:
+                return await asyncio.shield(waiter)
+            except asyncio.CancelledError:
+                # Stop the worker through its budget checks and hold the slot until it
+                # has actually returned; RDFCanonCancelled from it is expected.
+                token.cancel()
+                if not future.cancel():
+                    await asyncio.gather(waiter, return_exceptions=True)
+                raise
+
+    def close(self):
+        if self.owns_executor:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+            self.owns_executor = False
+        with self.manager_lock:
+            if self.manager is not None:
+                self.manager.shutdown()
+                self.manager = None
+
+    async def __aenter__(self) -> "RDFCanonAsync":
+        return self
+
+    async def __aexit__(self, *exc):
+        # Shutting down waits for running workers and the manager process.
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+
+async def canonize_async(
+    source: BatchInput,
+    hash_algorithm: str = None,
+    timeout: float = None,
+    runner: RDFCanonAsync = None,
+) -> str:
+    if runner is None:
+        loop = asyncio.get_running_loop()
+        runner = _runners.get(loop)
+        if runner is None:
+            runner = _runners[loop] = RDFCanonAsync()
+            # Loops are not closed through us, so release the pool with the loop.
+            weakref.finalize(loop, runner.close)
+    return await runner.canonize(source, timeout, hash_algorithm)
@@ -0,0 +1,199 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, Union
+from rdflib import Dataset
+from rdfcanon.main import RDFCanon
+from rdfcanon.nquads_reader import NQuadsSource
+from rdfcanon.nquads_serializer import serialize_iri, serialize_term
+from rdfcanon.rdfcanon_work_budget import RDFCanonWorkBudget
+
+
+BatchInput = Union[Dataset, NQuadsSource]
+
+# One engine per worker thread and hash algorithm, reused for every dataset. Engines
+# hold per-run state, so threads of a ThreadPoolExecutor must not share one.
+_local = threading.local()
+
+
+class RDFCanonBatchStats:
+    __slots__ = ("index", "datasets", "quads", "seconds")
+
+    def __init__(self, index: int, datasets: int, quads: int, seconds: float):
+        self.index = index
+        self.datasets = datasets
+        self.quads = quads
+        self.seconds = seconds
+
+    @property
+    def datasets_per_second(self) -> float:
+        return self.datasets / self.seconds if self.seconds else float("inf")
+
+    @property
+    def quads_per_second(self) -> float:
+        return self.quads / self.seconds if self.seconds else float("inf")
+
+    def __repr__(self):
+        return (
+            f"RDFCanonBatchStats(index={self.index}, datasets={self.datasets}, "
+            f"quads={self.quads}, seconds={self.seconds:.6f}, "
+            f"datasets_per_second={self.datasets_per_second:.1f})"
+        )
+
+
+def dataset_terms(dataset: Dataset) -> list[tuple[str, str, str, str]]:
+    default_graph = dataset.default_context.identifier
+    return [
+        (
+            serialize_term(s),
+            serialize_iri(p),
+            serialize_term(o),
+            "" if g == default_graph else serialize_term(g),
+        )
+        for s, p, o, g in dataset.quads()
+    ]
+
+
+def load_item(canon: RDFCanon, item):
+    # Items are term tuples flattened from rdflib datasets, or any N-Quads source.
+    if isinstance(item, list):
+        add_terms = canon.store.add_terms
+        for quad in item:
+            add_terms(*quad)
+    else:
+        canon.load_nquads(item)
+
+
+def canonize_items(
+    hash_algorithm: str, budget: RDFCanonWorkBudget, items: list
+) -> tuple[list[str], int, float]:
+    started = time.perf_counter()
+    engines: dict[str, RDFCanon] = getattr(_local, "engines", None)
+    if engines is None:
+        engines = _local.engines = dict()
+    canon = engines.get(hash_algorithm)
+    if canon is None:
+        canon = engines[hash_algorithm] = RDFCanon(hash_algorithm)
+    canon.budget = budget if budget is not None else RDFCanonWorkBudget()
+
+    outputs: list[str] = []
+    quads = 0
+    for item in items:
+        canon.reset()
+        load_item(canon, item)
+        quads += len(canon.store)
+        outputs.append(canon.canonize())
+    return outputs, quads, time.perf_counter() - started
+
+
+class RDFCanonBatch:
+    def __init__(
+        self,
+        hash_algorithm: str = "sha256",
+        workers: int = None,
+        batch_size: int = 64,
+        budget: RDFCanonWorkBudget = None,
+        executor: Executor = None,
+        on_batch: Callable[[RDFCanonBatchStats], None] = None,
+    ):
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+
+        self.hash_algorithm = hash_algorithm
+        self.workers = workers
+        self.batch_size = batch_size
+        self.budget = budget
+        self.executor = executor
+        self.owns_executor = False
+        self.on_batch = on_batch
+        self.batch_stats: list[RDFCanonBatchStats] = []
+
+    def get_executor(self) -> Executor:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.workers)
+            self.owns_executor = True
+        return self.executor
+
+    def close(self):
+        if self.owns_executor:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+            self.owns_executor = False
+
+    def __enter__(self) -> "RDFCanonBatch":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def batches(self, datasets: Iterable[BatchInput]) -> Iterator[list]:
+        batch = []
+        for dataset in datasets:
+            # rdflib datasets are flattened to term tuples, which pickle cheaply.
+            batch.append(dataset_terms(dataset) if isinstance(dataset, Dataset) else dataset)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def record(self, datasets: int, quads: int, seconds: float):
+        stats = RDFCanonBatchStats(len(self.batch_stats), datasets, quads, seconds)
+        self.batch_stats.append(stats)
+        if self.on_batch is not None:
+            self.on_batch(stats)
+
+    def canonize_many(self, datasets: Iterable[BatchInput]) -> Iterator[str]:
+        if self.executor is None and (self.workers is None or self.workers < 2):
+            for batch in self.batches(datasets):
+                outputs, quads, seconds = canonize_items(
+                    self.hash_algorithm, self.budget, batch
+                )
+                self.record(len(batch), quads, seconds)
+                yield from outputs
+            return
+
+        executor = self.get_executor()
+        max_pending = 2 * (self.workers or os.cpu_count() or 1)
+        pending = deque()
+
+        try:
+            for batch in self.batches(datasets):
+                future = executor.submit(
+                    canonize_items, self.hash_algorithm, self.budget, batch
+                )
+                pending.append((future, len(batch)))
+
+                while len(pending) >= max_pending or (pending and pending[0][0].done()):
+                    yield from self.collect(*pending.popleft())
+
+            while pending:
+                yield from self.collect(*pending.popleft())
+        finally:
+            for future, _ in pending:
+                future.cancel()
+
+    def collect(self, future, datasets: int) -> list[str]:
+        outputs, quads, seconds = future.result()
+        self.record(datasets, quads, seconds)
+        return outputs
+
+
+def canonize_many(
+    datasets: Iterable[BatchInput],
+    hash_algorithm: str = "sha256",
+    workers: int = None,
+    batch_size: int = 64,
+    budget: RDFCanonWorkBudget = None,
+    on_batch: Callable[[RDFCanonBatchStats], None] = None,
+) -> Iterator[str]:
+    with RDFCanonBatch(
+        hash_algorithm=hash_algorithm,
+        workers=workers,
+        batch_size=batch_size,
+        budget=budget,
+        on_batch=on_batch,
+    ) as batch:
+        yield from batch.canonize_many(datasets)
@@ -0,0 +1,168 @@
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+
+class RDFCanonCacheEntry:
+    __slots__ = ("output", "labels")
+
+    def __init__(self, output: str, labels: dict[str, str]):
+        self.output = output
+        self.labels = labels
+
+    def size(self) -> int:
+        # UTF-8 bytes, so max_bytes holds for non-ASCII literals and labels too.
+        return len(self.output.encode("utf-8")) + sum(
+            len(k.encode("utf-8")) + len(v.encode("utf-8")) for k, v in self.labels.items()
+        )
+
+
+class RDFCanonCache(ABC):
+    def __init__(self, max_entries: int = None, max_bytes: int = None):
+        if max_entries is not None and max_entries < 1:
+            raise ValueError("max_entries must be positive")
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError("max_bytes must be positive")
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> RDFCanonCacheEntry:
+        with self.lock:
+            entry = self.load(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def put(self, key: str, entry: RDFCanonCacheEntry):
+        with self.lock:
+            self.store(key, entry)
+            while self.over_limit():
+                self.evict()
+                self.evictions += 1
+
+    def over_limit(self) -> bool:
+        count, size = self.usage()
+        return (self.max_entries is not None and count > self.max_entries) or (
+            self.max_bytes is not None and size > self.max_bytes and count > 0
+        )
+
+    def stats(self) -> dict[str, int]:
+        count, size = self.usage()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": count,
+            "bytes": size,
+        }
+
+    @abstractmethod
+    def load(self, key: str) -> RDFCanonCacheEntry:
+        pass
+
+    @abstractmethod
+    def store(self, key: str, entry: RDFCanonCacheEntry):
+        pass
+
+    @abstractmethod
+    def evict(self):
+        pass
+
+    @abstractmethod
+    def usage(self) -> tuple[int, int]:
+        pass
+
+
+class RDFCanonMemoryCache(RDFCanonCache):
+    def __init__(self, max_entries: int = 1024, max_bytes: int = None):
+        super().__init__(max_entries, max_bytes)
+        self.entries: OrderedDict[str, RDFCanonCacheEntry] = OrderedDict()
+        self.size = 0
+
+    def load(self, key: str) -> RDFCanonCacheEntry:
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def store(self, key: str, entry: RDFCanonCacheEntry):
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.size -= previous.size()
+        self.entries[key] = entry
+        self.size += entry.size()
+
+    def evict(self):
+        _, entry = self.entries.popitem(last=False)
+        self.size -= entry.size()
+
+    def usage(self) -> tuple[int, int]:
+        return len(self.entries), self.size
+
+
+class RDFCanonSqliteCache(RDFCanonCache):
+    def __init__(self, path: str, max_entries: int = None, max_bytes: int = None):
+        super().__init__(max_entries, max_bytes)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS canon_cache ("
+            " key TEXT PRIMARY KEY,"
+            " output TEXT NOT NULL,"
+            " labels TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " accessed INTEGER NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS canon_cache_accessed ON canon_cache (accessed)"
+        )
+        self.connection.commit()
+        self.clock = self.connection.execute(
+            "SELECT COALESCE(MAX(accessed), 0) FROM canon_cache"
+        ).fetchone()[0]
+
+    def tick(self) -> int:
+        self.clock += 1
+        return self.clock
+
+    def load(self, key: str) -> RDFCanonCacheEntry:
+        row = self.connection.execute(
+            "SELECT output, labels FROM canon_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self.connection.execute(
+            "UPDATE canon_cache SET accessed = ? WHERE key = ?", (self.tick(), key)
+        )
+        self.connection.commit()
+        return RDFCanonCacheEntry(row[0], json.loads(row[1]))
+
+    def store(self, key: str, entry: RDFCanonCacheEntry):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO canon_cache VALUES (?, ?, ?, ?, ?)",
+            (key, entry.output, json.dumps(entry.labels), entry.size(), self.tick()),
+        )
+        self.connection.commit()
+
+    def evict(self):
+        self.connection.execute(
+            "DELETE FROM canon_cache WHERE key ="
+            " (SELECT key FROM canon_cache ORDER BY accessed LIMIT 1)"
+        )
+        self.connection.commit()
+
+    def usage(self) -> tuple[int, int]:
+        return self.connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM canon_cache"
+        ).fetchone()
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,152 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from rdfcanon.main import RDFCanon
+from rdfcanon.rdfcanon_time_ticker import RDFCanonTimeTicker
+
+
+STDIN = "-"
+OUTPUT_SUFFIXES = {"nquads": ".c14n.nq", "labels": ".labels.json", "hash": ".hash"}
+
+
+def output_path(path: str, args: argparse.Namespace) -> str:
+    name = "stdin" if path == STDIN else os.path.basename(path)
+    return os.path.join(args.output_dir, name + OUTPUT_SUFFIXES[args.output])
+
+
+def write_output(canon: RDFCanon, args: argparse.Namespace, target) -> str:
+    # Writes to target when given, otherwise returns the text for the parent process.
+    if args.output == "nquads":
+        if target is not None:
+            canon.canonize_to(target)
+            return None
+        text = canon.canonize()
+    elif args.output == "labels":
+        text = json.dumps(canon.canonical_labels(), sort_keys=True) + "\n"
+    else:
+        text = canon.canonical_hash(args.digest) + "\n"
+
+    if target is not None:
+        target.write(text)
+        return None
+    return text
+
+
+def process_input(path: str, source, args: argparse.Namespace) -> tuple[str, dict, str]:
+    # Errors come back as text: not every exception survives the trip from a worker.
+    try:
+        return (*canonicalise_input(path, source, args), None)
+    except Exception as e:
+        return None, None, f"{type(e).__name__}: {e}"
+
+
+def canonicalise_input(path: str, source, args: argparse.Namespace) -> tuple[str, dict]:
+    started = time.perf_counter()
+    with RDFCanon(
+        args.hash_algorithm,
+        ticker=RDFCanonTimeTicker(args.timeout) if args.timeout is not None else None,
+        memory_limit=args.memory_limit,
+    ) as canon:
+        canon.load_nquads(source)
+
+        if args.output_dir is not None:
+            with open(output_path(path, args), "w", encoding="utf-8", newline="\n") as f:
+                text = write_output(canon, args, f)
+        elif args.jobs == 1 and args.output == "nquads":
+            # A single worker streams the canonical lines straight to stdout.
+            text = write_output(canon, args, sys.stdout)
+        else:
+            text = write_output(canon, args, None)
+
+    stats = canon.stats().as_dict()
+    stats["seconds"] = time.perf_counter() - started
+    return text, stats
+
+
+def report(path: str, text: str, stats: dict, error: str, args: argparse.Namespace) -> int:
+    if error is not None:
+        print(f"rdfcanon: {path}: {error}", file=sys.stderr)
+        return 1
+    if text is not None:
+        if args.output == "hash" and len(args.inputs) > 1:
+            # One "<hash>  <file>" line per input, as sha256sum prints.
+            text = f"{text[:-1]}  {path}\n"
+        sys.stdout.write(text)
+    if args.stats:
+        print(json.dumps({"input": path, **stats}), file=sys.stderr)
+    return 0
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="rdfcanon", description="Canonicalise N-Quads with RDFC-1.0."
+    )
+    parser.add_argument(
+        "inputs", nargs="*", default=[STDIN], help="N-Quads files (default: stdin)"
+    )
+    parser.add_argument(
+        "--output",
+        choices=sorted(OUTPUT_SUFFIXES),
+        default="nquads",
+        help="canonical N-Quads, the blank node label map as JSON, or the canonical hash",
+    )
+    parser.add_argument("--output-dir", "-d", help="write one output file per input")
+    parser.add_argument("--hash-algorithm", default="sha256", help="RDFC-1.0 hash algorithm")
+    parser.add_argument("--digest", default="sha256", help="algorithm for --output hash")
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=1, help="inputs processed concurrently"
+    )
+    parser.add_argument("--timeout", type=int, help="milliseconds allowed per input")
+    parser.add_argument(
+        "--memory-limit", type=int, help="bytes of canonical lines kept in memory"
+    )
+    parser.add_argument(
+        "--stats", action="store_true", help="print timing and work stats to stderr"
+    )
+    args = parser.parse_args(argv)
+
+    if args.jobs < 1:
+        parser.error("--jobs must be positive")
+    if args.inputs.count(STDIN) > 1:
+        parser.error("stdin can only be read once")
+    if len(args.inputs) > 1 and args.output != "hash" and args.output_dir is None:
+        parser.error(f"--output {args.output} with several inputs needs --output-dir")
+    if args.output_dir is not None:
+        # Output files are named after the input's base name, so a/x.nq and b/x.nq clash.
+        targets: dict[str, str] = dict()
+        for path in args.inputs:
+            target = output_path(path, args)
+            if target in targets:
+                parser.error(f"{targets[target]} and {path} would both be written to {target}")
+            targets[target] = path
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    status = 0
+    if args.jobs == 1 or len(args.inputs) == 1:
+        args.jobs = 1
+        for path in args.inputs:
+            source = sys.stdin.buffer if path == STDIN else path
+            status |= report(path, *process_input(path, source, args), args)
+        return status
+
+    # Workers cannot share our stdin, so it is read up front. Results are reported in
+    # input order.
+    with ProcessPoolExecutor(args.jobs) as executor:
+        futures = [
+            (
+                path,
+                executor.submit(
+                    process_input,
+                    path,
+                    sys.stdin.buffer.read() if path == STDIN else path,
+                    args,
+                ),
+            )
+            for path in args.inputs
+        ]
+        for path, future in futures:
+            status |= report(path, *future.result(), args)
+    return status
@@ -0,0 +1,102 @@
+import heapq
+import os
+import tempfile
+from typing import Iterable, Iterator
+
+
+class ExternalSorter:
+    # Rough per-line overhead of a str object in the in-memory buffer.
+    LINE_OVERHEAD = 64
+    MAX_FAN_IN = 64
+
+    def __init__(self, memory_limit: int, temp_dir: str = None):
+        if memory_limit <= 0:
+            raise ValueError("memory_limit must be positive")
+
+        self.memory_limit = memory_limit
+        self.temp_dir = temp_dir
+        self.buffer: list[str] = []
+        self.buffer_size = 0
+        self.runs: list[str] = []
+        self.closed = False
+
+    def check_open(self):
+        if self.closed:
+            raise ValueError("ExternalSorter is closed")
+
+    def add(self, line: str):
+        self.check_open()
+        self.buffer.append(line)
+        self.buffer_size += len(line) + self.LINE_OVERHEAD
+        if self.buffer_size >= self.memory_limit:
+            self.spill()
+
+    def extend(self, lines: Iterable[str]):
+        for line in lines:
+            self.add(line)
+
+    def spill(self):
+        if not self.buffer:
+            return
+
+        self.buffer.sort()
+        self.runs.append(self._write_run(self.buffer))
+        self.buffer = []
+        self.buffer_size = 0
+
+        if len(self.runs) >= self.MAX_FAN_IN:
+            self._collapse_runs()
+
+    def _write_run(self, lines: Iterable[str]) -> str:
+        fd, path = tempfile.mkstemp(prefix="rdfcanon-", suffix=".run", dir=self.temp_dir)
+        with open(fd, "w", encoding="utf-8", newline="\n") as f:
+            for line in lines:
+                f.write(line)
+                f.write("\n")
+        return path
+
+    def _collapse_runs(self):
+        runs = self.runs
+        self.runs = []
+        files = [open(path, "r", encoding="utf-8", newline="\n") for path in runs]
+        try:
+            merged = heapq.merge(*[(line[:-1] for line in f) for f in files])
+            self.runs.append(self._write_run(merged))
+        finally:
+            for f in files:
+                f.close()
+            for path in runs:
+                os.remove(path)
+
+    def __iter__(self) -> Iterator[str]:
+        # Runs are kept, so the sorter can be merged again until it is closed.
+        self.check_open()
+        self.buffer.sort()
+        files = [open(path, "r", encoding="utf-8", newline="\n") for path in self.runs]
+        try:
+            streams = [(line[:-1] for line in f) for f in files]
+            streams.append(iter(self.buffer))
+
+            previous = None
+            for line in heapq.merge(*streams):
+                if line != previous:
+                    yield line
+                    previous = line
+        finally:
+            for f in files:
+                f.close()
+
+    def close(self):
+        for path in self.runs:
+            if os.path.exists(path):
+                os.remove(path)
+        self.runs = []
+        self.buffer = []
+        self.buffer_size = 0
+        self.closed = True
+
+    def __enter__(self) -> "ExternalSorter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
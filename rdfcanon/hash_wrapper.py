@@ -4,9 +4,13 @@ import hashlib
 class HashWrapper:
     def __init__(self, algo="sha256"):
         self.algo = algo
-        self.h = hashlib.new(algo)
+        # Copying a constructed hasher is cheaper than hashlib.new by name.
+        self.prototype = hashlib.new(algo)
+        self.h = self.prototype.copy()
+        self.bytes_hashed = 0
 
     def update(self, data):
+        self.bytes_hashed += len(data)
         self.h.update(data)
 
     def digest(self):
@@ -16,4 +20,17 @@ class HashWrapper:
         return self.h.hexdigest()
 
     def reset(self):
-        self.h = hashlib.new(self.algo)
+        self.h = self.prototype.copy()
+
+    def prefix(self, data: bytes):
+        # A hasher already fed with data; pass it to hexdigest_of to reuse the prefix.
+        h = self.prototype.copy()
+        self.bytes_hashed += len(data)
+        h.update(data)
+        return h
+
+    def hexdigest_of(self, data: bytes, prefix=None) -> str:
+        h = (self.prototype if prefix is None else prefix).copy()
+        self.bytes_hashed += len(data)
+        h.update(data)
+        return h.hexdigest()
@@ -1,27 +1,71 @@
+from typing import Hashable, Sequence
+
+
 class IdentifierIssuer:
+    __slots__ = ("prefix", "counter", "existing", "owners")
+
     def __init__(self, prefix):
         self.prefix = prefix
         self.counter = 0
         self.existing = {}
+        # Copies share existing until one of them issues or revokes an identifier.
+        # owners is a one-item list counting the live issuers sharing it; None when
+        # this issuer has never been copied.
+        self.owners: list[int] = None
 
-    def get_id(self, id: str) -> str:
-        if id in self.existing:
-            return self.existing[id]
-        else:
-            new_id = f"{self.prefix}{self.counter}"
-            self.existing[id] = new_id
-            self.counter += 1
-            return new_id
+    def get_id(self, id: Hashable) -> str:
+        label = self.existing.get(id)
+        if label is not None:
+            return label
 
-    def hasId(self, id: str) -> bool:
+        if self.owners is not None:
+            self.unshare()
+        new_id = f"{self.prefix}{self.counter}"
+        self.existing[id] = new_id
+        self.counter += 1
+        return new_id
+
+    def hasId(self, id: Hashable) -> bool:
         return id in self.existing
 
+    def revoke(self, id: Hashable):
+        # Only valid for the most recently issued identifier.
+        if self.owners is not None:
+            self.unshare()
+        del self.existing[id]
+        self.counter -= 1
+
+    def unshare(self):
+        # The map is copied only while another live issuer still shares it.
+        owners = self.owners
+        self.owners = None
+        owners[0] -= 1
+        if owners[0]:
+            self.existing = self.existing.copy()
+
+    def __del__(self):
+        owners = self.owners
+        if owners is not None:
+            owners[0] -= 1
+
     def assign(self, other: "IdentifierIssuer"):
         for k in self.existing.keys():
             other.get_id(k)
 
     def copy(self) -> "IdentifierIssuer":
+        new_issuer = IdentifierIssuer.__new__(IdentifierIssuer)
+        new_issuer.prefix = self.prefix
+        new_issuer.counter = self.counter
+        new_issuer.existing = self.existing
+        owners = self.owners
+        if owners is None:
+            owners = self.owners = [1]
+        owners[0] += 1
+        new_issuer.owners = owners
+        return new_issuer
+
+    def relabel(self, keys: Sequence[Hashable]) -> "IdentifierIssuer":
         new_issuer = IdentifierIssuer(self.prefix)
         new_issuer.counter = self.counter
-        new_issuer.existing = self.existing.copy()
-        return new_issuer
\ No newline at end of file
+        new_issuer.existing = {keys[k]: v for k, v in self.existing.items()}
+        return new_issuer
@@ -0,0 +1,282 @@
+import time
+from typing import Iterable, Iterator
+from rdflib import Dataset
+from rdflib.graph import DATASET_DEFAULT_GRAPH_ID
+from rdflib.term import Node
+from sortedcontainers import SortedList
+from rdfcanon.identifier_issuer import IdentifierIssuer
+from rdfcanon.main import RDFCanon
+from rdfcanon.n_degree_result import NDegreeResult
+from rdfcanon.nquads_reader import NQuadsSource, parse_nquads_line, parse_term, read_nquads
+from rdfcanon.nquads_serializer import serialize_iri, serialize_quad, serialize_term
+from rdfcanon.rdfcanon_stats import RDFCanonHooks
+from rdfcanon.rdfcanon_time_ticker import RDFCanonTimeTicker
+from rdfcanon.rdfcanon_work_budget import RDFCanonWorkBudget, RDFCanonWorkCounters
+
+
+def quad_terms(quad: tuple[Node, ...]) -> tuple[str, str, str, str]:
+    s, p, o = quad[:3]
+    g = quad[3] if len(quad) > 3 else None
+    return (
+        serialize_term(s),
+        serialize_iri(p),
+        serialize_term(o),
+        "" if g is None or g == DATASET_DEFAULT_GRAPH_ID else serialize_term(g),
+    )
+
+
+# Keeps the store, first-degree hashes, n-degree results and canonical lines between
+# updates. Only blank nodes on changed quads are rehashed, n-degree results are reused
+# for components whose quads and canonical labels are unchanged, and only quads whose
+# blank nodes were relabelled are serialized again.
+class RDFCanonIncremental(RDFCanon):
+    def __init__(
+        self,
+        hash_algorithm: str = "sha256",
+        dataset: Dataset = None,
+        ticker: RDFCanonTimeTicker = None,
+        budget: RDFCanonWorkBudget = None,
+        hooks: RDFCanonHooks = None,
+    ):
+        super().__init__(hash_algorithm, dataset, ticker=ticker, budget=budget, hooks=hooks)
+
+    def reset(self, dataset: Dataset = None):
+        super().reset(dataset)
+        # Ground quads never enter the store; their lines are final on arrival.
+        self.lines: SortedList[str] = SortedList()
+        self.row_lines: dict[tuple[int, int, int, int], str] = dict()
+        self.new_rows: set[tuple[int, int, int, int]] = set()
+        self.touched_blank_ids: set[int] = set()
+        self.versions: list[int] = []
+        self.n_degree_memo: dict[int, tuple[tuple, NDegreeResult]] = dict()
+        self.n_degree_reused = 0
+        self.lines_added: set[str] = set()
+        self.lines_removed: set[str] = set()
+
+    @classmethod
+    def from_nquads(
+        cls,
+        source: NQuadsSource,
+        hash_algorithm: str = "sha256",
+        ticker: RDFCanonTimeTicker = None,
+        budget: RDFCanonWorkBudget = None,
+        hooks: RDFCanonHooks = None,
+    ) -> "RDFCanonIncremental":
+        canon = cls(hash_algorithm=hash_algorithm, ticker=ticker, budget=budget, hooks=hooks)
+        canon.load_nquads(source)
+        return canon
+
+    def load_nquads(self, source: NQuadsSource):
+        for quad in read_nquads(source):
+            self.add_terms(*quad)
+
+    def init_blank_id_quad_map(self, graph: Dataset):
+        for s, p, o, g in graph.quads():
+            self.add((s, p, o, None if g == self.default_graph else g))
+
+    def add(self, quad: tuple[Node, ...]) -> bool:
+        return self.add_terms(*quad_terms(quad))
+
+    def remove(self, quad: tuple[Node, ...]) -> bool:
+        return self.remove_terms(*quad_terms(quad))
+
+    def update(self, added: Iterable[tuple[Node, ...]] = (), removed: Iterable[tuple[Node, ...]] = ()):
+        for quad in removed:
+            self.remove(quad)
+        for quad in added:
+            self.add(quad)
+
+    def add_terms(self, subject: str, predicate: str, object: str, graph: str = "") -> bool:
+        if "_" not in (subject[:1], object[:1], graph[:1]):
+            line = serialize_quad(subject, predicate, object, graph)
+            if line in self.lines:
+                return False
+            self.line_added(line)
+            return True
+
+        store = self.store
+        row = (
+            store.intern_text(subject),
+            store.intern_term(predicate),
+            store.intern_text(object),
+            store.intern_text(graph),
+        )
+        if not store.add(*row):
+            return False
+        self.new_rows.add(row)
+        self.touch(row)
+        return True
+
+    def remove_terms(self, subject: str, predicate: str, object: str, graph: str = "") -> bool:
+        if "_" not in (subject[:1], object[:1], graph[:1]):
+            line = serialize_quad(subject, predicate, object, graph)
+            if line not in self.lines:
+                return False
+            self.line_removed(line)
+            return True
+
+        store = self.store
+        ids = [store.term_ids.get(predicate)]
+        for text in (subject, object, graph):
+            if text.startswith("_:"):
+                id = store.blank_ids.get(text[2:])
+                ids.append(None if id is None else ~id)
+            else:
+                ids.append(store.term_ids.get(text))
+        if None in ids:
+            return False
+
+        row = (ids[1], ids[0], ids[2], ids[3])
+        if not store.remove(*row):
+            return False
+        self.new_rows.discard(row)
+        line = self.row_lines.pop(row, None)
+        if line is not None:
+            self.line_removed(line)
+        self.touch(row)
+        return True
+
+    def touch(self, row: tuple[int, int, int, int]):
+        for node in (row[0], row[2], row[3]):
+            if node < 0:
+                self.touched_blank_ids.add(~node)
+
+    def line_added(self, line: str):
+        self.lines.add(line)
+        if line in self.lines_removed:
+            self.lines_removed.remove(line)
+        else:
+            self.lines_added.add(line)
+
+    def line_removed(self, line: str):
+        self.lines.remove(line)
+        if line in self.lines_added:
+            self.lines_added.remove(line)
+        else:
+            self.lines_removed.add(line)
+
+    def label_blank_nodes(self):
+        self.check_budget()
+        self.load_dataset()
+
+        touched = self.touched_blank_ids
+        if not touched:
+            return
+
+        store = self.store
+        self.versions.extend([0] * (store.blank_count - len(self.versions)))
+        for blank_id in touched:
+            self.first_degree_hashes.pop(blank_id, None)
+            self.versions[blank_id] += 1
+
+        self.component_of = store.components()
+        self.component_members: dict[int, list[int]] = dict()
+        for blank_id, component in enumerate(self.component_of):
+            self.component_members.setdefault(component, []).append(blank_id)
+
+        previous_labels = self.canon_labels
+        self.canon_issuer = IdentifierIssuer("_:c14n")
+        self.hash_to_blank_id_map.clear()
+        self.hash_group_sizes.clear()
+        self.work = RDFCanonWorkCounters()
+        started = self.issue_ids(time.perf_counter())
+        self.make_canon_labels()
+        started = self.phase("make_canon_labels", started)
+
+        relabelled = [
+            blank_id
+            for blank_id, label in enumerate(self.canon_labels)
+            if blank_id >= len(previous_labels) or previous_labels[blank_id] != label
+        ]
+        rows = set(self.new_rows)
+        for blank_id in relabelled:
+            rows.update(store.blank_rows_of(blank_id))
+
+        # Drop every stale line before adding new ones: relabelling can hand one
+        # quad's old line to another quad.
+        for row in rows:
+            line = self.row_lines.pop(row, None)
+            if line is not None:
+                self.line_removed(line)
+
+        terms = store.terms
+        canon_labels = self.canon_labels
+        for row in rows:
+            line = serialize_quad(*(terms[x] if x >= 0 else canon_labels[~x] for x in row))
+            self.row_lines[row] = line
+            self.line_added(line)
+
+        self.new_rows.clear()
+        touched.clear()
+        self.phase("make_canon_quads", started)
+        if self.hooks is not None:
+            self.hooks.finished(self.stats())
+
+    def n_degree_key(self, blank_id: int) -> tuple:
+        # Everything hash_n_degree_quads reads: the quads of the component, which only
+        # change with the members' versions, and the labels issued so far within it.
+        existing = self.canon_issuer.existing
+        return tuple(
+            (member, self.versions[member], existing.get(member))
+            for member in self.component_members[self.component_of[blank_id]]
+        )
+
+    def hash_n_degree_group(self, blank_ids: Iterable[int]) -> list[NDegreeResult]:
+        hash_path_list: list[NDegreeResult] = []
+
+        for blank_id in blank_ids:
+            self.tick()
+            if self.canon_issuer.hasId(blank_id):
+                continue
+
+            key = self.n_degree_key(blank_id)
+            memo = self.n_degree_memo.get(blank_id)
+            if memo is not None and memo[0] == key:
+                self.n_degree_reused += 1
+                hash_path_list.append(memo[1])
+                continue
+
+            blank_issuer = IdentifierIssuer("_:b")
+            blank_issuer.get_id(blank_id)
+
+            path: NDegreeResult = self.hash_n_degree_quads(blank_id, blank_issuer)
+            self.n_degree_memo[blank_id] = (key, path)
+            hash_path_list.append(path)
+
+        return hash_path_list
+
+    def make_canon_quads(self):
+        pass
+
+    def relabel(self, in_place: bool = False) -> Dataset:
+        if in_place:
+            raise ValueError("RDFCanonIncremental does not update its input Dataset")
+
+        dataset = super().relabel()
+        # Ground quads are only held as canonical lines.
+        blank_lines = set(self.row_lines.values())
+        for line in self.lines:
+            if line not in blank_lines:
+                s, p, o, g = parse_nquads_line(line)
+                dataset.add(
+                    (
+                        parse_term(s),
+                        parse_term(p),
+                        parse_term(o),
+                        parse_term(g) if g else DATASET_DEFAULT_GRAPH_ID,
+                    )
+                )
+        return dataset
+
+    def iter_canonical_quads(self) -> Iterator[str]:
+        self.label_blank_nodes()
+        return iter(self.lines)
+
+    def canonical_diff(self) -> tuple[list[str], list[str]]:
+        # Canonical lines removed and added since the previous canonical_diff call.
+        self.label_blank_nodes()
+        removed = sorted(self.lines_removed)
+        added = sorted(self.lines_added)
+        self.lines_removed.clear()
+        self.lines_added.clear()
+        return removed, added
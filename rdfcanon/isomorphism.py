@@ -0,0 +1,64 @@
+from collections import Counter
+from typing import Union
+from rdflib import Dataset
+from rdfcanon.main import RDFCanon
+from rdfcanon.nquads_reader import NQuadsSource
+from rdfcanon.nquads_serializer import serialize_quad
+from rdfcanon.rdfcanon_work_budget import RDFCanonWorkBudget
+
+
+IsomorphismInput = Union[Dataset, NQuadsSource]
+
+
+def load(source: IsomorphismInput, hash_algorithm: str, budget: RDFCanonWorkBudget) -> RDFCanon:
+    if isinstance(source, Dataset):
+        canon = RDFCanon(hash_algorithm, source, budget=budget)
+        canon.load_dataset()
+        return canon
+    return RDFCanon.from_nquads(source, hash_algorithm, budget=budget)
+
+
+def ground_lines(canon: RDFCanon) -> set[str]:
+    terms = canon.store.terms
+    return {
+        serialize_quad(terms[s], terms[p], terms[o], terms[g])
+        for s, p, o, g in canon.store.rows()
+        if s >= 0 and o >= 0 and g >= 0
+    }
+
+
+def blank_lines(canon: RDFCanon) -> set[str]:
+    terms = canon.store.terms
+    canon_labels = canon.canon_labels
+    return {
+        serialize_quad(*(terms[x] if x >= 0 else canon_labels[~x] for x in row))
+        for row in canon.store.blank_rows
+    }
+
+
+def first_degree_hashes(canon: RDFCanon) -> Counter:
+    return Counter(canon.hash_first_degree(blank_id) for blank_id in range(canon.store.blank_count))
+
+
+def isomorphic(
+    a: IsomorphismInput,
+    b: IsomorphismInput,
+    hash_algorithm: str = "sha256",
+    budget: RDFCanonWorkBudget = None,
+) -> bool:
+    # Cheapest checks first; n-degree hashing only runs once everything else agrees.
+    left = load(a, hash_algorithm, budget)
+    right = load(b, hash_algorithm, budget)
+
+    if len(left.store.blank_rows) != len(right.store.blank_rows):
+        return False
+    if left.store.blank_count != right.store.blank_count:
+        return False
+    if ground_lines(left) != ground_lines(right):
+        return False
+    if first_degree_hashes(left) != first_degree_hashes(right):
+        return False
+
+    left.label_blank_nodes()
+    right.label_blank_nodes()
+    return blank_lines(left) == blank_lines(right)
@@ -1,258 +1,836 @@
-import itertools
-import re
-from rdflib import Dataset, URIRef
-from rdflib.term import Node, BNode
+import hashlib
+import multiprocessing
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterable, Iterator, TextIO, Union
+from rdflib import Dataset
+from rdflib.graph import DATASET_DEFAULT_GRAPH_ID
+from rdflib.term import BNode, Node
 from sortedcontainers import SortedDict
+from rdfcanon.cache import RDFCanonCache, RDFCanonCacheEntry
+from rdfcanon.external_sort import ExternalSorter
 from rdfcanon.hash_wrapper import HashWrapper
 from rdfcanon.identifier_issuer import IdentifierIssuer
 from rdfcanon.n_degree_result import NDegreeResult
+from rdfcanon.nquads_reader import NQuadsSource, parse_nquads_line, parse_term, read_nquads
+from rdfcanon.nquads_serializer import serialize_iri, serialize_quad, serialize_term
+from rdfcanon.parallel import PendingNDegreeHashes, first_degree_hashes
+from rdfcanon.quad_store import QuadStore
+from rdfcanon.rdfcanon_stats import RDFCanonHooks, RDFCanonStats
 from rdfcanon.rdfcanon_time_ticker import RDFCanonTimeTicker
+from rdfcanon.rdfcanon_work_budget import (
+    RDFCanonCancellationToken,
+    RDFCanonCancelled,
+    RDFCanonEventCancellationToken,
+    RDFCanonLimitExceeded,
+    RDFCanonWorkBudget,
+    RDFCanonWorkCounters,
+)
 
 
 class RDFCanon:
 
     BLANK_A = "_:a"
     BLANK_Z = "_:z"
+    PARALLEL_MIN_BLANK_NODES = 512
+    PARALLEL_MIN_HASH_GROUP = 4
+    PARALLEL_LOOKAHEAD = 64
+    DIGEST_CHUNK_LINES = 1024
+    PATH_NO_BLANK_NODES = "no_blank_nodes"
+    PATH_UNIQUE_HASHES = "unique_hashes"
+    PATH_N_DEGREE = "n_degree"
+    PATH_CACHED = "cached"
+    # Bounded LRU of hash_n_degree_quads results. After N_DEGREE_CACHE_PROBE lookups it
+    # is switched off for the run unless at least 1 in N_DEGREE_CACHE_MIN_HIT_RATIO hit.
+    N_DEGREE_CACHE_SIZE = 4096
+    N_DEGREE_CACHE_PROBE = 256
+    N_DEGREE_CACHE_MIN_HIT_RATIO = 16
+    EXECUTOR_TYPES = {"process": ProcessPoolExecutor, "thread": ThreadPoolExecutor}
 
     def __init__(
         self,
         hash_algorithm: str,
-        dataset: Dataset,
+        dataset: Dataset = None,
         ticker: RDFCanonTimeTicker = None,
+        memory_limit: int = None,
+        temp_dir: str = None,
+        budget: RDFCanonWorkBudget = None,
+        workers: int = None,
+        executor: Executor = None,
+        executor_type: str = "process",
+        cache: RDFCanonCache = None,
+        hooks: RDFCanonHooks = None,
     ):
-        self.blank_id_to_quad_map: dict[str, list[tuple[Node, Node, Node, Node]]] = (
-            dict()
-        )
-        self.blank_id_to_node_map = dict()
-        self.non_normalized_blank_ids: set[str] = set()
-        self.blank_id_to_normalized_blank_ids_map: dict[str, str] = dict()
-        self.hash_to_blank_id_map: SortedDict[str, set[str]] = SortedDict()
+        if executor_type not in self.EXECUTOR_TYPES:
+            raise ValueError(f"Unknown executor type {executor_type!r}")
+        if cache is not None and memory_limit is not None:
+            raise ValueError("cache cannot be combined with memory_limit")
+
+        self.memory_limit = memory_limit
+        self.temp_dir = temp_dir
         self.digest = HashWrapper(hash_algorithm)
+        self.hash_to_blank_id_map: SortedDict[str, set[int]] = SortedDict()
+        self.first_degree_hashes: dict[int, str] = dict()
+        self.ticker = ticker
+        self.budget = budget if budget is not None else RDFCanonWorkBudget()
+        self.workers = workers
+        self.executor = executor
+        self.executor_type = executor_type
+        self.owns_executor = False
+        self.manager = None
+        self.worker_token: RDFCanonCancellationToken = None
+        self.cache = cache
+        self.hooks = hooks
+        self.reset(dataset)
+
+    def reset(self, dataset: Dataset = None):
+        self.close()
+        self.store = QuadStore()
+        self.spooled = False
+        self.spool: ExternalSorter = (
+            ExternalSorter(self.memory_limit, self.temp_dir)
+            if self.memory_limit is not None
+            else None
+        )
+        self.non_normalized_blank_ids: set[int] = set()
+        self.hash_to_blank_id_map.clear()
+        self.first_degree_hashes.clear()
+        self.first_degree_cache_hits = 0
+        self.phase_seconds: dict[str, float] = dict()
+        self.hash_group_sizes: dict[int, int] = dict()
+        self.digest.bytes_hashed = 0
+        # (position, predicate id) -> hasher fed with the position tag and predicate.
+        self.related_prefixes: dict[tuple[int, int], object] = dict()
+        self.first_degree_cache_misses = 0
+        self.n_degree_cache: OrderedDict[tuple, tuple[str, list[int]]] = OrderedDict()
         self.canon_issuer = IdentifierIssuer("_:c14n")
+        self.canon_labels: list[str] = []
         self.canon_quads: list[str] = []
         self.dataset = dataset
-        self.quads = dataset.quads()
-        self.ticker = ticker
-
-    def init_blank_id_quad_map(self, graph: Dataset):
-        for quad in graph.quads():
-            for node in quad:
-                if isinstance(node, BNode):
-                    blank_id = str(node)
-                    if blank_id not in self.blank_id_to_quad_map:
-                        self.blank_id_to_quad_map[blank_id] = []
-                    self.blank_id_to_quad_map[blank_id].append(quad)
-
-                    if blank_id not in self.blank_id_to_normalized_blank_ids_map:
-                        self.blank_id_to_normalized_blank_ids_map[blank_id] = ""
+        self.loaded = dataset is None
+        self.labelled = False
+        self.labelling_path: str = None
+        self.default_graph = (
+            dataset.default_context.identifier if dataset is not None else None
+        )
+        self.work = RDFCanonWorkCounters()
 
-    def init_non_normalized_blank_ids(self):
-        self.non_normalized_blank_ids = set(self.blank_id_to_quad_map.keys())
+    @classmethod
+    def from_nquads(
+        cls,
+        source: NQuadsSource,
+        hash_algorithm: str = "sha256",
+        ticker: RDFCanonTimeTicker = None,
+        memory_limit: int = None,
+        temp_dir: str = None,
+        budget: RDFCanonWorkBudget = None,
+        workers: int = None,
+        executor: Executor = None,
+        executor_type: str = "process",
+        cache: RDFCanonCache = None,
+        hooks: RDFCanonHooks = None,
+    ) -> "RDFCanon":
+        canon = cls(
+            hash_algorithm=hash_algorithm,
+            ticker=ticker,
+            memory_limit=memory_limit,
+            temp_dir=temp_dir,
+            budget=budget,
+            workers=workers,
+            executor=executor,
+            executor_type=executor_type,
+            cache=cache,
+            hooks=hooks,
+        )
+        canon.load_nquads(source)
+        return canon
+
+    def parallel_workers(self) -> int:
+        if self.executor is None and (self.workers is None or self.workers < 2):
+            return 0
+        return self.workers or os.cpu_count() or 1
+
+    def get_executor(self) -> Executor:
+        if self.executor is None:
+            self.executor = self.EXECUTOR_TYPES[self.executor_type](self.workers)
+            self.owns_executor = True
+        return self.executor
+
+    def shutdown_executor(self):
+        if self.owns_executor:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+            self.owns_executor = False
+        self.worker_token = None
+        if self.manager is not None:
+            self.manager.shutdown()
+            self.manager = None
+
+    def get_worker_token(self) -> RDFCanonCancellationToken:
+        # One token per run for n-degree workers; plain tokens do not cross processes.
+        if self.worker_token is None:
+            if isinstance(self.get_executor(), ProcessPoolExecutor):
+                self.manager = multiprocessing.Manager()
+                self.worker_token = RDFCanonEventCancellationToken(self.manager.Event())
+            else:
+                self.worker_token = RDFCanonCancellationToken()
+        return self.worker_token
+
+    def tick(self):
+        work = self.work
+        work.ticks += 1
+        if not work.ticks & self.budget.check_mask:
+            self.check_budget()
+
+    def check_budget(self):
+        token = self.budget.cancellation_token
+        if token is not None and token.cancelled:
+            raise RDFCanonCancelled(self.work)
+        if self.ticker is not None:
+            self.ticker.tick()
 
-    def prepare_quads_for_hashing(
-        self, quad: tuple[Node, Node, Node, Node], blank_id: str
-    ) -> str:
+    def phase(self, name: str, started: float) -> float:
+        now = time.perf_counter()
+        seconds = now - started
+        self.phase_seconds[name] = self.phase_seconds.get(name, 0.0) + seconds
+        if self.hooks is not None:
+            self.hooks.phase(name, seconds)
+        return now
+
+    def stats(self) -> RDFCanonStats:
+        work = self.work
+        return RDFCanonStats(
+            path=self.labelling_path,
+            phases=dict(self.phase_seconds),
+            quads=len(self.store),
+            blank_nodes=self.store.blank_count,
+            hash_first_degree_calls=self.first_degree_cache_misses,
+            first_degree_cache_hits=self.first_degree_cache_hits,
+            n_degree_calls=work.n_degree_calls,
+            max_recursion_depth=work.max_recursion_depth,
+            permutations=work.permutations,
+            permutations_pruned=work.permutations_pruned,
+            n_degree_cache_hits=work.n_degree_cache_hits,
+            n_degree_cache_misses=work.n_degree_cache_misses,
+            bytes_hashed=self.digest.bytes_hashed,
+            hash_group_sizes=dict(self.hash_group_sizes),
+        )
 
-        subject = f"<{quad[0]}>"
-        if isinstance(quad[0], BNode):
-            subject = self.BLANK_A if str(quad[0]) == blank_id else self.BLANK_Z
+    def load_nquads(self, source: NQuadsSource):
+        started = time.perf_counter()
+        add_terms = self.store.add_terms
+        spool = self.spool
+        for quad in read_nquads(source):
+            if spool is not None and "_" not in (quad[0][:1], quad[2][:1], quad[3][:1]):
+                spool.add(serialize_quad(*quad))
+            else:
+                add_terms(*quad)
+        self.phase("load", started)
 
-        object = f"<{quad[2]}>" if isinstance(quad[2], URIRef) else quad[2].n3()
-        if isinstance(quad[2], BNode):
-            object = self.BLANK_A if str(quad[2]) == blank_id else self.BLANK_Z
+    def load_dataset(self):
+        if not self.loaded:
+            started = time.perf_counter()
+            self.init_blank_id_quad_map(self.dataset)
+            self.loaded = True
+            self.phase("load", started)
 
-        graph = f"<{quad[3]}>" if quad[3] != self.dataset.default_context.identifier else ".\n"
-        if graph != "" and isinstance(quad[3], BNode):
-            graph = self.BLANK_A if str(quad[3]) == blank_id else self.BLANK_Z
-            graph = f"{graph} .\n"
+    def init_blank_id_quad_map(self, graph: Dataset):
+        store = self.store
+        spool = self.spool
+        for s, p, o, g in graph.quads():
+            if spool is not None and not (
+                isinstance(s, BNode) or isinstance(o, BNode) or isinstance(g, BNode)
+            ):
+                spool.add(
+                    serialize_quad(
+                        serialize_term(s),
+                        serialize_iri(p),
+                        serialize_term(o),
+                        "" if g == self.default_graph else serialize_term(g),
+                    )
+                )
+                continue
 
-        return f"{subject} <{quad[1]}> {object} {graph}"
+            store.add(
+                store.intern_node(s),
+                store.intern_term(serialize_iri(p)),
+                store.intern_node(o),
+                store.DEFAULT_GRAPH if g == self.default_graph else store.intern_node(g),
+            )
 
-    def hash_first_degree(self, blank_id: str) -> str:
+    def init_non_normalized_blank_ids(self):
+        blank_quads = self.store.blank_quads
+        self.non_normalized_blank_ids = {
+            blank_id for blank_id in range(self.store.blank_count) if blank_quads[blank_id]
+        }
+
+    def hash_first_degree(self, blank_id: int) -> str:
+        hash = self.first_degree_hashes.get(blank_id)
+        if hash is not None:
+            self.first_degree_cache_hits += 1
+            return hash
+
+        self.first_degree_cache_misses += 1
+        hash = self.compute_first_degree_hash(blank_id)
+        self.first_degree_hashes[blank_id] = hash
+        return hash
+
+    def compute_first_degree_hash(self, blank_id: int) -> str:
+        # Every term is already interned as its N-Quads text, so a quad is spliced
+        # from the row with _:a/_:z in place.
+        store = self.store
+        terms = store.terms
+        quads = store.quads
+        quad_indexes = store.blank_quads[blank_id]
+        reference = ~blank_id
+        a = self.BLANK_A
+        z = self.BLANK_Z
+
+        work = self.work
+        ticks = work.ticks
+        work.ticks = ticks + len(quad_indexes)
+        if work.ticks > ticks | self.budget.check_mask:
+            self.check_budget()
 
-        related = self.blank_id_to_quad_map[blank_id]
         prepared_quads: list[str] = []
-
-        for quad in related:
-            self.ticker.tick()
-            prepared_quad = self.prepare_quads_for_hashing(quad, blank_id)
-            prepared_quads.append(prepared_quad)
+        for quad_index in quad_indexes:
+            offset = quad_index << 2
+            s, p, o, g = quads[offset : offset + 4]
+            subject = terms[s] if s >= 0 else a if s == reference else z
+            object = terms[o] if o >= 0 else a if o == reference else z
+            if g:
+                graph = terms[g] if g > 0 else a if g == reference else z
+                prepared_quads.append(f"{subject} {terms[p]} {object} {graph} .\n")
+            else:
+                prepared_quads.append(f"{subject} {terms[p]} {object} .\n")
 
         prepared_quads.sort()
 
-        self.digest.reset()
-
-        for pq in prepared_quads:
-            self.digest.update(pq.encode("utf-8"))
+        return self.digest.hexdigest_of("".join(prepared_quads).encode("utf-8"))
 
-        return self.digest.hexdigest()
+    def hash_first_degree_parallel(self, blank_ids: list[int]):
+        hashes = first_degree_hashes(
+            self, self.get_executor(), self.parallel_workers(), blank_ids
+        )
+        self.first_degree_cache_misses += len(hashes)
+        self.first_degree_hashes.update(hashes)
 
     def issueSimpleIds(self):
-        simple: bool = True
-
-        while simple:
-            self.ticker.tick()
-            simple = False
-            self.hash_to_blank_id_map.clear()
-            for blank_id in self.non_normalized_blank_ids:
-                hash: str = self.hash_first_degree(blank_id)
-                if hash not in self.hash_to_blank_id_map:
-                    self.hash_to_blank_id_map[hash] = set()
-                self.hash_to_blank_id_map[hash].add(blank_id)
-
-        for hash in list(self.hash_to_blank_id_map.keys()):
-            self.ticker.tick()
-            blank_ids = self.hash_to_blank_id_map[hash]
+        workers = self.parallel_workers()
+        if workers and len(self.non_normalized_blank_ids) >= self.PARALLEL_MIN_BLANK_NODES:
+            self.hash_first_degree_parallel(
+                sorted(
+                    blank_id
+                    for blank_id in self.non_normalized_blank_ids
+                    if blank_id not in self.first_degree_hashes
+                )
+            )
+
+        # Issuing a label never changes a first-degree hash, so one pass suffices.
+        # Groups are collected in a plain dict; only colliding groups are kept, in
+        # hash order, for the n-degree phase.
+        self.tick()
+        groups: dict[str, set[int]] = dict()
+        for blank_id in self.non_normalized_blank_ids:
+            hash: str = self.hash_first_degree(blank_id)
+            group = groups.get(hash)
+            if group is None:
+                groups[hash] = {blank_id}
+            else:
+                group.add(blank_id)
+
+        self.hash_to_blank_id_map.clear()
+        sizes = self.hash_group_sizes
+        for hash in sorted(groups):
+            self.tick()
+            blank_ids = groups[hash]
+            sizes[len(blank_ids)] = sizes.get(len(blank_ids), 0) + 1
             if len(blank_ids) == 1:
                 blank_id = next(iter(blank_ids))
                 self.canon_issuer.get_id(blank_id)
                 self.non_normalized_blank_ids.remove(blank_id)
-                del self.hash_to_blank_id_map[hash]
-                simple = True
-            else:
-                print(
-                    f"Hash collision for hash {hash} with blank IDs: {', '.join(blank_ids)}"
-                )
-
-    def issue_n_degree_ids(self):
-        for k, v in self.hash_to_blank_id_map.items():
-
-            hash_path_list: list[NDegreeResult] = []
-
-            for blank_id in v:
-                self.ticker.tick()
-                if self.canon_issuer.hasId(blank_id):
-                    continue
-
-                blank_issuer = IdentifierIssuer("_:b")
-                blank_issuer.get_id(blank_id)
-
-                path: NDegreeResult = self.hash_n_degree_quads(blank_id, blank_issuer)
-                hash_path_list.append(path)
-
-            hash_path_list.sort()
-
-            for result in hash_path_list:
-                self.ticker.tick()
-                result.issuer.assign(self.canon_issuer)
-
-    def hash_n_degree_quads(self, id: str, issuer: IdentifierIssuer) -> NDegreeResult:
-        return HashNDegreeQuads(self).hash(id, issuer)
-
-    def make_canon_quads(self):
+                continue
 
-        for blank_id in self.blank_id_to_normalized_blank_ids_map.keys():
-            canon_id = self.canon_issuer.get_id(blank_id)
-            self.blank_id_to_normalized_blank_ids_map[blank_id] = canon_id
-
-        sorted_quads: list[tuple[Node, Node, Node, Node]] = list(self.quads)
-        lines: list[str] = []
-
-        for quad in sorted_quads:
-            subject = quad[0]
-            if isinstance(subject, BNode):
-                subject = BNode(
-                    self.blank_id_to_normalized_blank_ids_map[str(quad[0])][2:]
-                )
-            object = quad[2]
-            if isinstance(object, BNode):
-                object = BNode(
-                    self.blank_id_to_normalized_blank_ids_map[str(quad[2])][2:]
+            self.hash_to_blank_id_map[hash] = blank_ids
+            if self.hooks is not None:
+                self.hooks.hash_collision(
+                    hash, [self.store.blank_labels[b] for b in blank_ids]
                 )
 
-            graph = quad[3]
-            if isinstance(graph, BNode):
-                graph = BNode(
-                    self.blank_id_to_normalized_blank_ids_map[str(quad[3])][2:]
+    def issue_n_degree_ids(self):
+        # Entries hold blank node ids and canonical labels, so they only last one pass.
+        self.n_degree_cache = OrderedDict()
+        groups = list(self.hash_to_blank_id_map.values())
+        workers = self.parallel_workers()
+        # Components only schedule work ahead for executors; serial runs go in order.
+        if workers:
+            self.init_components(groups)
+
+        pending: dict[int, PendingNDegreeHashes] = dict()
+        try:
+            for index, group in enumerate(groups):
+                if workers:
+                    self.submit_ready_groups(groups, index, workers, pending)
+
+                if index in pending:
+                    hash_path_list = pending.pop(index).result()
+                else:
+                    hash_path_list = self.hash_n_degree_group(group)
+
+                self.issue_hash_group(hash_path_list)
+        except BaseException:
+            # Stops chunks already running in workers at their next budget check.
+            if self.worker_token is not None:
+                self.worker_token.cancel()
+            raise
+        finally:
+            for hashes in pending.values():
+                hashes.cancel()
+
+    def hash_n_degree_group(self, blank_ids: Iterable[int]) -> list[NDegreeResult]:
+        hash_path_list: list[NDegreeResult] = []
+
+        for blank_id in blank_ids:
+            self.tick()
+            if self.canon_issuer.hasId(blank_id):
+                continue
+
+            blank_issuer = IdentifierIssuer("_:b")
+            blank_issuer.get_id(blank_id)
+
+            path: NDegreeResult = self.hash_n_degree_quads(blank_id, blank_issuer)
+            hash_path_list.append(path)
+
+        return hash_path_list
+
+    def issue_hash_group(self, hash_path_list: list[NDegreeResult]):
+        hash_path_list.sort()
+
+        for result in hash_path_list:
+            self.tick()
+            result.issuer.assign(self.canon_issuer)
+
+    def init_components(self, groups: list[set[int]]):
+        # Canonical labels are global, so a hash group has to wait for every earlier
+        # group that touches one of its connected components. Groups with no such
+        # dependency on an unissued group can be hashed ahead of their turn.
+        self.component_of = self.store.components()
+        self.component_members: dict[int, list[int]] = dict()
+        for blank_id, component in enumerate(self.component_of):
+            self.component_members.setdefault(component, []).append(blank_id)
+
+        self.group_blockers: list[int] = []
+        last_group: dict[int, int] = dict()
+        for index, group in enumerate(groups):
+            components = {self.component_of[b] for b in group}
+            self.group_blockers.append(
+                max((last_group.get(c, -1) for c in components), default=-1)
+            )
+            for component in components:
+                last_group[component] = index
+
+    def submit_ready_groups(
+        self,
+        groups: list[set[int]],
+        index: int,
+        workers: int,
+        pending: dict[int, PendingNDegreeHashes],
+    ):
+        for ahead in range(index, min(len(groups), index + self.PARALLEL_LOOKAHEAD)):
+            if ahead in pending or self.group_blockers[ahead] >= index:
+                continue
+
+            blank_ids = [b for b in groups[ahead] if not self.canon_issuer.hasId(b)]
+            if len(blank_ids) < self.PARALLEL_MIN_HASH_GROUP:
+                continue
+
+            components = {self.component_of[b] for b in blank_ids}
+            component = sorted(
+                blank_id for c in components for blank_id in self.component_members[c]
+            )
+            pending[ahead] = PendingNDegreeHashes(
+                self,
+                self.get_executor(),
+                workers,
+                blank_ids,
+                component,
+                self.get_worker_token(),
+            )
+
+    def n_degree_fingerprint(self, id: int, issuer: IdentifierIssuer) -> tuple:
+        # hash_n_degree_quads only follows blank nodes it labels itself, so it reads the
+        # labels of the blank nodes bordering the unlabelled region around id, and issues
+        # new ones from issuer.counter. Labels elsewhere cannot change the result.
+        canon = self.canon_issuer.existing
+        existing = issuer.existing
+        blank_rows_of = self.store.blank_rows_of
+        seen = {id}
+        stack = [id]
+        border = []
+        while stack:
+            for quad in blank_rows_of(stack.pop()):
+                for position in (0, 2, 3):
+                    node = quad[position]
+                    if node < 0 and ~node not in seen:
+                        node = ~node
+                        seen.add(node)
+                        label = canon.get(node) or existing.get(node)
+                        if label is None:
+                            stack.append(node)
+                        else:
+                            border.append((node, label))
+        border.sort()
+        return id, existing[id], issuer.counter, tuple(border)
+
+    def hash_n_degree_quads(self, id: int, issuer: IdentifierIssuer) -> NDegreeResult:
+        work = self.work
+        budget = self.budget
+
+        # Top-level calls start from a fresh issuer per blank node and never repeat.
+        cache = self.n_degree_cache
+        key = None
+        if cache is not None and work.recursion_depth:
+            key = self.n_degree_fingerprint(id, issuer)
+            entry = cache.get(key)
+            if entry is not None:
+                cache.move_to_end(key)
+                work.n_degree_cache_hits += 1
+                hash, issued = entry
+                # Replaying the issued nodes yields the same labels from the same counter.
+                issuer = issuer.copy()
+                for related in issued:
+                    issuer.get_id(related)
+                return NDegreeResult(hash, issuer)
+            work.n_degree_cache_misses += 1
+
+        work.n_degree_calls += 1
+        if (
+            budget.max_n_degree_calls is not None
+            and work.n_degree_calls > budget.max_n_degree_calls
+        ):
+            raise RDFCanonLimitExceeded(
+                "max_n_degree_calls", budget.max_n_degree_calls, work
+            )
+
+        work.recursion_depth += 1
+        if work.recursion_depth > work.max_recursion_depth:
+            work.max_recursion_depth = work.recursion_depth
+            if (
+                budget.max_recursion_depth is not None
+                and work.recursion_depth > budget.max_recursion_depth
+            ):
+                raise RDFCanonLimitExceeded(
+                    "max_recursion_depth", budget.max_recursion_depth, work
                 )
 
-            d = Dataset()
-            if graph == self.dataset.default_context.identifier:
-                d.add((subject, quad[1], object))
-            else:
-                d.add((subject, quad[1], object, graph))
-
-            lines.append(d.serialize(format="nquads"))
-
-        output = []
-        for line in lines:
-            line = self.canonicalize_nquads_escapes(line)
-            line = ''.join(line.rsplit('\\n\\n', 1))
-            line = ' .'.join(line.rsplit('  .', 1))
-            output.append(line)
+        try:
+            result = HashNDegreeQuads(self).hash(id, issuer)
+        finally:
+            work.recursion_depth -= 1
+
+        if key is not None and self.n_degree_cache is cache:
+            cache[key] = (result.hash, list(result.issuer.existing)[issuer.counter :])
+            if len(cache) > self.N_DEGREE_CACHE_SIZE:
+                cache.popitem(last=False)
+            lookups = work.n_degree_cache_hits + work.n_degree_cache_misses
+            if (
+                lookups >= self.N_DEGREE_CACHE_PROBE
+                and work.n_degree_cache_hits * self.N_DEGREE_CACHE_MIN_HIT_RATIO < lookups
+            ):
+                self.n_degree_cache = None
+        return result
+
+    def make_canon_labels(self):
+        labels = self.store.blank_labels
+        blank_quads = self.store.blank_quads
+        # Blank nodes whose quads were all removed get no label.
+        self.canon_labels = [
+            self.canon_issuer.get_id(blank_id) if blank_quads[blank_id] else None
+            for blank_id in range(len(labels))
+        ]
+        self.canon_issuer = self.canon_issuer.relabel(labels)
+
+    def serialize_canon_rows(self) -> Iterator[str]:
+        terms = self.store.terms
+        canon_labels = self.canon_labels
+
+        for s, p, o, g in self.store.rows():
+            yield serialize_quad(
+                terms[s] if s >= 0 else canon_labels[~s],
+                terms[p],
+                terms[o] if o >= 0 else canon_labels[~o],
+                terms[g] if g >= 0 else canon_labels[~g],
+            )
+
+    def serialize_ground_rows(self) -> Iterator[str]:
+        terms = self.store.terms
+        for s, p, o, g in self.store.rows():
+            yield serialize_quad(terms[s], terms[p], terms[o], terms[g])
 
+    def make_canon_quads(self):
+        rows = (
+            self.serialize_ground_rows()
+            if self.labelling_path == self.PATH_NO_BLANK_NODES
+            else self.serialize_canon_rows()
+        )
+        if self.spool is not None:
+            # The spool keeps its runs, so later calls merge them again.
+            if not self.spooled:
+                self.spool.extend(rows)
+                self.spooled = True
+            return
+
+        output: list[str] = list(rows)
         output.sort()
-        # print("\n".join(output))
-        self.canon_quads = output
-
-    def canonicalize_nquads_escapes(self, nq: str) -> str:
-        def repl(match):
-            ch = match.group(0)
-            code = ord(ch)
+        # Only blank-node-free quads can repeat: the store de-duplicates the rest.
+        self.canon_quads = [
+            line for i, line in enumerate(output) if i == 0 or line != output[i - 1]
+        ]
+
+    def label_blank_nodes(self):
+        if self.labelled:
+            return
+
+        self.check_budget()
+
+        self.load_dataset()
+        started = time.perf_counter()
+        try:
+            started = self.issue_ids(started)
+        finally:
+            self.shutdown_executor()
+        self.make_canon_labels()
+        self.labelled = True
+        self.phase("make_canon_labels", started)
+
+    def issue_ids(self, started: float) -> float:
+        # Common inputs skip phases: without blank nodes nothing is hashed, and when
+        # every first-degree hash is unique the n-degree phase never runs.
+        self.init_non_normalized_blank_ids()
+        if not self.non_normalized_blank_ids:
+            self.labelling_path = self.PATH_NO_BLANK_NODES
+            return started
 
-            short = {
-                0x08: r"\b",
-                0x09: r"\t",
-                0x0A: r"\n",
-                0x0C: r"\f",
-                0x0D: r"\r",
-            }
+        self.issueSimpleIds()
+        started = self.phase("issue_simple_ids", started)
+        if not self.hash_to_blank_id_map:
+            self.labelling_path = self.PATH_UNIQUE_HASHES
+            return started
 
-            if code in short:
-                return short[code]
-            return f"\\u{code:04X}"
+        self.labelling_path = self.PATH_N_DEGREE
+        self.issue_n_degree_ids()
+        return self.phase("issue_n_degree_ids", started)
+
+    def canonical_labels(self) -> dict[str, str]:
+        # Input blank node label -> canonical label, without serializing any quad.
+        if self.cache is not None:
+            self.load_dataset()
+            entry = self.cache.get(self.input_key())
+            if entry is not None:
+                self.restore(entry)
+                return dict(entry.labels)
+
+        self.label_blank_nodes()
+        return dict(self.canon_issuer.existing)
+
+    def canonical_node(self, id: int) -> Node:
+        if id < 0:
+            return BNode(self.canon_labels[~id][2:])
+        if id == QuadStore.DEFAULT_GRAPH:
+            return DATASET_DEFAULT_GRAPH_ID
+        return parse_term(self.store.terms[id])
+
+    def relabel(self, in_place: bool = False) -> Dataset:
+        # A Dataset with canonical blank nodes. in_place updates the input Dataset;
+        # otherwise a new one is built from the loaded quads.
+        self.label_blank_nodes()
+
+        if in_place:
+            if self.dataset is None:
+                raise ValueError("in_place relabelling needs a Dataset input")
+            return self.relabel_dataset(self.dataset)
+
+        if self.spool is not None:
+            raise ValueError("relabel cannot be combined with memory_limit")
+
+        dataset = Dataset()
+        nodes: dict[int, Node] = dict()
+        for row in self.store.rows():
+            quad = []
+            for id in row:
+                node = nodes.get(id)
+                if node is None:
+                    node = nodes[id] = self.canonical_node(id)
+                quad.append(node)
+            dataset.add(tuple(quad))
+        return dataset
+
+    def relabel_dataset(self, dataset: Dataset) -> Dataset:
+        labels = {
+            label: BNode(canonical[2:])
+            for label, canonical in self.canon_issuer.existing.items()
+        }
+
+        def canonical(node: Node) -> Node:
+            return labels[str(node)] if isinstance(node, BNode) else node
+
+        # Remove every blank node quad before adding any: a canonical label may
+        # also be an input label of another blank node.
+        quads = [
+            quad
+            for quad in dataset.quads()
+            if isinstance(quad[0], BNode)
+            or isinstance(quad[2], BNode)
+            or isinstance(quad[3], BNode)
+        ]
+        for quad in quads:
+            dataset.remove(quad)
+        for graph in {g for _, _, _, g in quads if isinstance(g, BNode)}:
+            dataset.remove_graph(graph)
+        for s, p, o, g in quads:
+            dataset.add((canonical(s), p, canonical(o), canonical(g)))
+        return dataset
+
+    def iter_canonical_quads(self) -> Iterator[str]:
+        self.label_blank_nodes()
+        started = time.perf_counter()
+        self.make_canon_quads()
+        self.phase("make_canon_quads", started)
+        if self.hooks is not None:
+            self.hooks.finished(self.stats())
 
-        # C0 controls + DEL
-        return re.sub(r"[\x00-\x1F\x7F]", repl, nq)
+        if self.spool is None:
+            yield from self.canon_quads
+        else:
+            yield from self.spool
+
+    def close(self):
+        # Removes the spooled runs of memory_limit mode; output calls fail afterwards.
+        spool = getattr(self, "spool", None)
+        if spool is not None:
+            spool.close()
+
+    def __enter__(self) -> "RDFCanon":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def canonize_to(self, target: Union[str, os.PathLike, TextIO]) -> int:
+        if isinstance(target, (str, os.PathLike)):
+            with open(target, "w", encoding="utf-8", newline="\n") as f:
+                return self.canonize_to(f)
+
+        count = 0
+        for line in self.iter_canonical_quads():
+            target.write(line)
+            target.write("\n")
+            count += 1
+        return count
+
+    def update_digest(self, sink) -> int:
+        # Feeds the canonical N-Quads as UTF-8 to anything with update(bytes), a chunk
+        # of lines at a time, without building the output string.
+        count = 0
+        chunk: list[str] = []
+        for line in self.iter_canonical_quads():
+            chunk.append(line)
+            if len(chunk) == self.DIGEST_CHUNK_LINES:
+                sink.update(("\n".join(chunk) + "\n").encode("utf-8"))
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            sink.update(("\n".join(chunk) + "\n").encode("utf-8"))
+            count += len(chunk)
+        return count
+
+    def canonical_hash(self, algorithm: str = "sha256") -> str:
+        # Hash of the canonical N-Quads document; algorithm is independent of the
+        # hash algorithm used for labelling.
+        hasher = hashlib.new(algorithm)
+        if self.cache is not None:
+            hasher.update(self.canonize().encode("utf-8"))
+        else:
+            self.update_digest(hasher)
+        return hasher.hexdigest()
+
+    def canonical_graph_hashes(self, algorithm: str = "sha256") -> dict[str, str]:
+        # Hash of the canonical lines of each graph, keyed by its canonical term ("" for
+        # the default graph). Lines arrive sorted, so each graph's lines are sorted too.
+        hashers = dict()
+        for line in self.iter_canonical_quads():
+            graph = parse_nquads_line(line)[3]
+            hasher = hashers.get(graph)
+            if hasher is None:
+                hasher = hashers[graph] = hashlib.new(algorithm)
+            hasher.update(line.encode("utf-8"))
+            hasher.update(b"\n")
+        return {graph: hasher.hexdigest() for graph, hasher in hashers.items()}
+
+    def input_key(self) -> str:
+        # Content address of the input as given, blank node labels included.
+        terms = self.store.terms
+        labels = self.store.blank_labels
+        lines = {
+            serialize_quad(*(terms[x] if x >= 0 else f"_:{labels[~x]}" for x in row))
+            for row in self.store.rows()
+        }
+
+        digest = hashlib.sha256()
+        for line in sorted(lines):
+            digest.update(line.encode("utf-8"))
+            digest.update(b"\n")
+        return f"{self.digest.algo}:{digest.hexdigest()}"
+
+    def restore(self, entry: RDFCanonCacheEntry):
+        self.canon_issuer = IdentifierIssuer("_:c14n")
+        self.canon_issuer.existing = dict(entry.labels)
+        self.canon_issuer.counter = len(entry.labels)
+        self.canon_labels = [entry.labels[label] for label in self.store.blank_labels]
+        self.canon_quads = entry.output.split("\n")[:-1]
+        self.labelled = True
+        self.labelling_path = self.PATH_CACHED
 
     def canonize(self) -> str:
 
-        self.ticker.tick()
+        key = None
+        if self.cache is not None:
+            self.load_dataset()
+            key = self.input_key()
+            entry = self.cache.get(key)
+            if entry is not None:
+                self.restore(entry)
+                return entry.output
 
-        self.init_blank_id_quad_map(self.dataset)
-        self.init_non_normalized_blank_ids()
-        self.issueSimpleIds()
-        self.issue_n_degree_ids()
-        self.make_canon_quads()
+        output = "\n".join(self.iter_canonical_quads()) + "\n"
+        output = output if output != "\n" else ""
 
-        output = "\n".join(self.canon_quads) + "\n"
+        if key is not None:
+            self.cache.put(key, RDFCanonCacheEntry(output, dict(self.canon_issuer.existing)))
 
-        return output if output != "\n" else ""
+        return output
 
 
 class HashNDegreeQuads:
     def __init__(self, outer: RDFCanon):
         self.data_to_hash: list[str] = []
         self.chosen_issuer = None
-        self.chosen_path: list[str] = []
+        self.chosen_path: str = ""
+        self.chosen_version = 0
+        self.permutations = 0
         self.outer = outer
 
-    def append_to_path(
-        self,
-        related: str,
-        path: list[str],
-        issuer_copy: IdentifierIssuer,
-        recursion_list: list[str],
-    ):
-        if self.outer.canon_issuer.hasId(related):
-            path.append(self.outer.canon_issuer.get_id(related))
-        else:
-            if not issuer_copy.hasId(related):
-                recursion_list.append(related)
+    def create_hash_to_related(self, id: int, issuer: IdentifierIssuer) -> SortedDict:
+        hash_to_related: SortedDict[str, set[int]] = SortedDict()
 
-            path.append(issuer_copy.get_id(related))
-
-    def create_hash_to_related(self, id: str, issuer: IdentifierIssuer) -> SortedDict:
-        hash_to_related: SortedDict[str, set[str]] = SortedDict()
-
-        refer = self.outer.blank_id_to_quad_map[id]
-
-        for quad in refer:
-            self.outer.ticker.tick()
-            for position in [0, 2, 3]:
+        for quad in self.outer.store.blank_rows_of(id):
+            self.outer.tick()
+            for position in (0, 2, 3):
                 node = quad[position]
-                if isinstance(node, BNode):
-                    related = str(node)
+                if node < 0:
+                    related = ~node
                     if related != id:
                         hash: str = self.hash_related_blank_node(
                             related, quad, issuer, position
@@ -261,61 +839,130 @@ class HashNDegreeQuads:
 
         return hash_to_related
 
-    def do_permutation(self, permutation: list[str], issuer: IdentifierIssuer):
+    def compare_to_chosen(self, offset: int, segment: str) -> int:
+        # Only called while path[:offset] == chosen_path[:offset].
+        if self.chosen_issuer is None:
+            return -1
+        chosen = self.chosen_path[offset : offset + len(segment)]
+        return (segment > chosen) - (segment < chosen)
 
-        self.outer.ticker.tick()
-        issuer_copy = issuer.copy()
-        path: list[str] = []
-        recursion_list: list[str] = []
+    def permute(
+        self,
+        remaining: list[int],
+        issuer: IdentifierIssuer,
+        path: str,
+        state: int,
+        recursion_list: list[int],
+    ):
+        # Depth-first walk over the permutations of a hash group. Siblings share
+        # the path prefix and the issuer (identifiers are revoked on the way back),
+        # and a prefix already greater than the chosen path prunes its subtree.
+        # state is how path compares to chosen_path: -1 less, 0 equal prefix.
+        if not remaining:
+            self.finish_permutation(issuer, path, state, recursion_list)
+            return
+
+        canon_issuer = self.outer.canon_issuer
+        version = self.chosen_version
+
+        for i, related in enumerate(remaining):
+            self.outer.tick()
+
+            if version != self.chosen_version:
+                # The new chosen path extends the current prefix.
+                version = self.chosen_version
+                state = 0
+
+            issued = False
+            if canon_issuer.hasId(related):
+                label = canon_issuer.get_id(related)
+            else:
+                issued = not issuer.hasId(related)
+                label = issuer.get_id(related)
+
+            next_state = state if state != 0 else self.compare_to_chosen(len(path), label)
+
+            if next_state <= 0:
+                if issued:
+                    recursion_list.append(related)
+                self.permute(
+                    remaining[:i] + remaining[i + 1 :],
+                    issuer,
+                    path + label,
+                    next_state,
+                    recursion_list,
+                )
+                if issued:
+                    recursion_list.pop()
+            else:
+                self.outer.work.permutations_pruned += 1
 
-        for related in permutation:
-            self.outer.ticker.tick()
-            self.append_to_path(related, path, issuer_copy, recursion_list)
+            if issued:
+                issuer.revoke(related)
 
-            if len(self.chosen_path) > 0 and "".join(path) > "".join(self.chosen_path):
-                return
+    def finish_permutation(
+        self,
+        issuer: IdentifierIssuer,
+        path: str,
+        state: int,
+        recursion_list: list[int],
+    ):
+        work = self.outer.work
+        budget = self.outer.budget
+        self.permutations += 1
+        work.permutations += 1
+        if (
+            budget.max_permutations is not None
+            and self.permutations > budget.max_permutations
+        ):
+            raise RDFCanonLimitExceeded("max_permutations", budget.max_permutations, work)
+
+        # hash_n_degree_quads only reads the issuer it is given, so the search issuer
+        # is passed as is and copied only if it becomes the chosen one.
+        search_issuer = issuer
 
         for related in recursion_list:
-            self.outer.ticker.tick()
-            result: NDegreeResult = self.outer.hash_n_degree_quads(related, issuer_copy)
+            self.outer.tick()
+            result: NDegreeResult = self.outer.hash_n_degree_quads(related, issuer)
 
-            path.extend([issuer_copy.get_id(related), "<", result.hash, ">"])
-            issuer_copy = result.issuer
+            segment = f"{issuer.get_id(related)}<{result.hash}>"
+            issuer = result.issuer
 
-            if len(self.chosen_path) > 0 and "".join(path) > "".join(self.chosen_path):
-                return
+            if state == 0:
+                state = self.compare_to_chosen(len(path), segment)
+                if state > 0:
+                    work.permutations_pruned += 1
+                    return
+            path += segment
 
-        if len(self.chosen_path) == 0 or "".join(path) < "".join(self.chosen_path):
+        if state < 0 or (state == 0 and len(path) < len(self.chosen_path)):
             self.chosen_path = path
-            self.chosen_issuer = issuer_copy
+            self.chosen_issuer = issuer.copy() if issuer is search_issuer else issuer
+            self.chosen_version += 1
 
-    def hash(self, id: str, default_issuer: IdentifierIssuer) -> NDegreeResult:
+    def hash(self, id: int, default_issuer: IdentifierIssuer) -> NDegreeResult:
 
         hash_to_related: SortedDict = self.create_hash_to_related(id, default_issuer)
 
         for k, v in hash_to_related.items():
             self.data_to_hash.append(k)
-            self.chosen_path = []
+            self.chosen_path = ""
             self.chosen_issuer = None
+            self.permutations = 0
 
-            permutations = [list(p) for p in itertools.permutations(v)]
-
-            for permutation in permutations:
-                self.outer.ticker.tick()
-                self.do_permutation(permutation, default_issuer)
+            self.permute(list(v), default_issuer.copy(), "", 0, [])
 
-            self.data_to_hash.extend(self.chosen_path)
+            self.data_to_hash.append(self.chosen_path)
             default_issuer = self.chosen_issuer
 
-        self.outer.digest.reset()
-        self.outer.digest.update("".join(self.data_to_hash).encode("utf-8"))
-        hash: str = self.outer.digest.hexdigest()
+        # Labels and hex digests only, so the path is ASCII.
+        hash: str = self.outer.digest.hexdigest_of("".join(self.data_to_hash).encode("ascii"))
         return NDegreeResult(hash, default_issuer)
 
     def hash_related_blank_node(
         self,
-        related: str,
-        quad: tuple[Node, Node, Node, Node],
+        related: int,
+        quad: tuple[int, int, int, int],
         issuer: IdentifierIssuer,
         position: int,
     ) -> str:
@@ -329,17 +976,16 @@ class HashNDegreeQuads:
         else:
             id = self.outer.hash_first_degree(related)
 
-        self.outer.digest.reset()
-        self.outer.digest.update(self.get_position_tag(position).encode("utf-8"))
-
-        if position != 3:
-            self.outer.digest.update("<".encode("utf-8"))
-            self.outer.digest.update(quad[1].encode("utf-8"))
-            self.outer.digest.update(">".encode("utf-8"))
-
-        self.outer.digest.update(id.encode("utf-8"))
+        outer = self.outer
+        key = (position, quad[1] if position != 3 else -1)
+        prefix = outer.related_prefixes.get(key)
+        if prefix is None:
+            data = self.get_position_tag(position)
+            if position != 3:
+                data += outer.store.terms[quad[1]]
+            prefix = outer.related_prefixes[key] = outer.digest.prefix(data.encode("utf-8"))
 
-        return self.outer.digest.hexdigest()
+        return outer.digest.hexdigest_of(id.encode("ascii"), prefix)
 
     def get_position_tag(self, position: int) -> str:
         if position == 0:
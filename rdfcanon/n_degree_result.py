@@ -2,6 +2,7 @@ from rdfcanon.identifier_issuer import IdentifierIssuer
 
 
 class NDegreeResult:
+    __slots__ = ("hash", "issuer")
 
     def __init__(self, hash: str, issuer: IdentifierIssuer):
         self.hash = hash
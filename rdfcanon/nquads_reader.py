@@ -0,0 +1,154 @@
+import mmap
+import os
+import re
+from typing import BinaryIO, Iterator, TextIO, Union
+from rdflib import BNode, Literal, URIRef
+from rdflib.term import Node
+from rdfcanon.nquads_serializer import serialize_iri, serialize_literal
+
+
+NQuadsSource = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO, TextIO]
+
+_IRI = r"<([^\x00-\x20<>\"{}|^`]*)>"
+_BLANK = r"_:([^\s<>\"]*[^\s<>\".])"
+_LITERAL = (
+    r"\"((?:[^\"\\\n\r]|\\.)*)\""
+    r"(?:\^\^" + _IRI + r"|@([a-zA-Z]+(?:-[a-zA-Z0-9]+)*))?"
+)
+_WS = r"[ \t]*"
+
+_LINE = re.compile(
+    _WS
+    + f"(?:{_IRI}|{_BLANK})"
+    + _WS
+    + _IRI
+    + _WS
+    + f"(?:{_IRI}|{_BLANK}|{_LITERAL})"
+    + _WS
+    + f"(?:(?:{_IRI}|{_BLANK}){_WS})?"
+    + r"\."
+    + _WS
+    + r"(?:#.*)?"
+)
+_EMPTY = re.compile(_WS + r"(?:#.*)?")
+
+_ESCAPE = re.compile(r"\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))", re.DOTALL)
+_ECHARS = {
+    "t": "\t",
+    "b": "\b",
+    "n": "\n",
+    "r": "\r",
+    "f": "\f",
+    '"': '"',
+    "'": "'",
+    "\\": "\\",
+}
+
+
+class NQuadsSyntaxError(ValueError):
+    def __init__(self, message: str, line_number: int):
+        super().__init__(f"{message} (line {line_number})")
+        self.line_number = line_number
+
+
+def _unescape_match(match: re.Match) -> str:
+    code = match.group(1) or match.group(2)
+    if code is not None:
+        return chr(int(code, 16))
+    char = _ECHARS.get(match.group(3))
+    if char is None:
+        raise ValueError(f"Invalid escape sequence \\{match.group(3)}")
+    return char
+
+
+def unescape(value: str) -> str:
+    if "\\" not in value:
+        return value
+    return _ESCAPE.sub(_unescape_match, value)
+
+
+def parse_term(text: str) -> Node:
+    # Inverse of serialize_term for the canonical term text held by QuadStore.
+    if text.startswith("<"):
+        return URIRef(text[1:-1])
+    if text.startswith("_:"):
+        return BNode(text[2:])
+
+    end = text.rindex('"')
+    value = unescape(text[1:end])
+    suffix = text[end + 1 :]
+    if suffix.startswith("@"):
+        return Literal(value, lang=suffix[1:])
+    if suffix.startswith("^^"):
+        return Literal(value, datatype=URIRef(suffix[3:-1]), normalize=False)
+    return Literal(value)
+
+
+def _node(iri: str, blank: str) -> str:
+    if iri is not None:
+        return serialize_iri(unescape(iri))
+    return f"_:{blank}"
+
+
+def parse_nquads_line(line: str, line_number: int = 0) -> tuple[str, str, str, str]:
+    match = _LINE.fullmatch(line)
+    if match is None:
+        if _EMPTY.fullmatch(line):
+            return None
+        raise NQuadsSyntaxError(f"Invalid N-Quads statement {line!r}", line_number)
+
+    (
+        s_iri,
+        s_blank,
+        p_iri,
+        o_iri,
+        o_blank,
+        o_value,
+        o_datatype,
+        o_language,
+        g_iri,
+        g_blank,
+    ) = match.groups()
+
+    try:
+        if o_value is not None:
+            object = serialize_literal(
+                unescape(o_value),
+                o_language,
+                unescape(o_datatype) if o_datatype is not None else None,
+            )
+        else:
+            object = _node(o_iri, o_blank)
+
+        graph = ""
+        if g_iri is not None or g_blank is not None:
+            graph = _node(g_iri, g_blank)
+
+        return _node(s_iri, s_blank), serialize_iri(unescape(p_iri)), object, graph
+    except ValueError as e:
+        raise NQuadsSyntaxError(str(e), line_number) from e
+
+
+def _lines(source: NQuadsSource) -> Iterator[str]:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        for line in bytes(source).decode("utf-8").split("\n"):
+            yield line.rstrip("\r")
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for line in iter(mm.readline, b""):
+                    yield line.decode("utf-8").rstrip("\r\n")
+    else:
+        for line in source:
+            if isinstance(line, bytes):
+                line = line.decode("utf-8")
+            yield line.rstrip("\r\n")
+
+
+def read_nquads(source: NQuadsSource) -> Iterator[tuple[str, str, str, str]]:
+    for line_number, line in enumerate(_lines(source), start=1):
+        quad = parse_nquads_line(line, line_number)
+        if quad is not None:
+            yield quad
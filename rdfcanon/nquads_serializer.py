@@ -0,0 +1,53 @@
+from rdflib import Literal, URIRef
+from rdflib.term import BNode, Node
+
+
+_STRING_ESCAPES = {code: f"\\u{code:04X}" for code in (*range(0x20), 0x7F)}
+_STRING_ESCAPES.update(
+    {
+        0x08: r"\b",
+        0x09: r"\t",
+        0x0A: r"\n",
+        0x0C: r"\f",
+        0x0D: r"\r",
+        0x22: r"\"",
+        0x5C: r"\\",
+    }
+)
+_STRING_ESCAPE_TABLE = str.maketrans(_STRING_ESCAPES)
+
+
+def escape_string(value: str) -> str:
+    return value.translate(_STRING_ESCAPE_TABLE)
+
+
+def serialize_iri(iri: str) -> str:
+    return f"<{iri}>"
+
+
+def serialize_blank(label: str) -> str:
+    return f"_:{label}"
+
+
+def serialize_literal(value: str, language: str = None, datatype: str = None) -> str:
+    if language:
+        return f'"{escape_string(value)}"@{language}'
+    if datatype:
+        return f'"{escape_string(value)}"^^<{datatype}>'
+    return f'"{escape_string(value)}"'
+
+
+def serialize_term(term: Node) -> str:
+    if isinstance(term, URIRef):
+        return f"<{term}>"
+    if isinstance(term, Literal):
+        return serialize_literal(str(term), term.language, term.datatype)
+    if isinstance(term, BNode):
+        return f"_:{term}"
+    raise ValueError(f"Cannot serialize term {term!r} as N-Quads")
+
+
+def serialize_quad(subject: str, predicate: str, object: str, graph: str = "") -> str:
+    if graph:
+        return f"{subject} {predicate} {object} {graph} ."
+    return f"{subject} {predicate} {object} ."
@@ -0,0 +1,184 @@
+from concurrent.futures import FIRST_COMPLETED, Executor, wait
+from typing import Iterable, Iterator
+from rdfcanon.quad_store import QuadStore
+
+
+# Seconds between budget checks while waiting for workers.
+POLL_INTERVAL = 0.05
+
+
+def chunked(items: list, chunks: int) -> list[list]:
+    size = max(1, -(-len(items) // chunks))
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def completed(canon, futures: Iterable) -> Iterator:
+    # Like as_completed, but the caller's budget is checked while workers run, so a
+    # cancellation or timeout raises here instead of after the slowest chunk.
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, POLL_INTERVAL, FIRST_COMPLETED)
+        canon.check_budget()
+        yield from done
+
+
+def hash_first_degree_chunk(
+    hash_algorithm: str, store: QuadStore, count: int
+) -> tuple[list[str], int]:
+    from rdfcanon.main import RDFCanon
+
+    canon = RDFCanon(hash_algorithm)
+    canon.store = store
+    hashes = [canon.compute_first_degree_hash(blank_id) for blank_id in range(count)]
+    return hashes, canon.digest.bytes_hashed
+
+
+def first_degree_hashes(
+    canon, executor: Executor, workers: int, blank_ids: list[int]
+) -> dict[int, str]:
+    futures = {}
+    for chunk in chunked(blank_ids, workers * 4):
+        future = executor.submit(
+            hash_first_degree_chunk,
+            canon.digest.algo,
+            canon.store.subset(chunk),
+            len(chunk),
+        )
+        futures[future] = chunk
+
+    hashes: dict[int, str] = dict()
+    try:
+        for future in completed(canon, futures):
+            canon.tick()
+            chunk_hashes, bytes_hashed = future.result()
+            hashes.update(zip(futures[future], chunk_hashes))
+            canon.digest.bytes_hashed += bytes_hashed
+    finally:
+        for future in futures:
+            future.cancel()
+    return hashes
+
+
+def hash_n_degree_chunk(
+    hash_algorithm: str,
+    store: QuadStore,
+    canon_existing: dict[int, str],
+    first_degree_hashes: dict[int, str],
+    budget,
+    blank_ids: list[int],
+) -> tuple[list, dict[str, int]]:
+    from rdfcanon.identifier_issuer import IdentifierIssuer
+    from rdfcanon.main import RDFCanon
+
+    canon = RDFCanon(hash_algorithm, budget=budget)
+    canon.store = store
+    canon.canon_issuer.existing = canon_existing
+    canon.first_degree_hashes = first_degree_hashes
+
+    results = []
+    for blank_id in blank_ids:
+        issuer = IdentifierIssuer("_:b")
+        issuer.get_id(blank_id)
+        results.append(canon.hash_n_degree_quads(blank_id, issuer))
+    counters = canon.work.as_dict()
+    counters["bytes_hashed"] = canon.digest.bytes_hashed
+    return results, counters
+
+
+class PendingNDegreeHashes:
+    def __init__(
+        self,
+        canon,
+        executor: Executor,
+        workers: int,
+        blank_ids: list[int],
+        component: list[int],
+        cancellation_token,
+    ):
+        from rdfcanon.rdfcanon_work_budget import RDFCanonWorkBudget
+
+        # Ship only the blank nodes connected to this hash group, renumbered.
+        self.canon = canon
+        self.component = component
+        index_of = {blank_id: index for index, blank_id in enumerate(component)}
+        store = canon.store.subset(component)
+        canon_existing = {
+            index_of[b]: label
+            for b, label in canon.canon_issuer.existing.items()
+            if b in index_of
+        }
+        first_degree = {
+            index_of[b]: hash
+            for b, hash in canon.first_degree_hashes.items()
+            if b in index_of
+        }
+
+        budget = canon.budget
+        max_n_degree_calls = budget.max_n_degree_calls
+        if max_n_degree_calls is not None:
+            max_n_degree_calls = max(0, max_n_degree_calls - canon.work.n_degree_calls)
+        # The caller's token would be pickled into process workers and never seen set,
+        # so workers get one the parent cancels when the run stops.
+        task_budget = RDFCanonWorkBudget(
+            max_n_degree_calls=max_n_degree_calls,
+            max_recursion_depth=budget.max_recursion_depth,
+            max_permutations=budget.max_permutations,
+            cancellation_token=cancellation_token,
+            check_interval=budget.check_mask + 1,
+        )
+
+        self.futures = {}
+        for position, chunk in enumerate(chunked(blank_ids, workers)):
+            future = executor.submit(
+                hash_n_degree_chunk,
+                canon.digest.algo,
+                store,
+                canon_existing,
+                first_degree,
+                task_budget,
+                [index_of[blank_id] for blank_id in chunk],
+            )
+            self.futures[future] = position
+
+    def result(self) -> list:
+        from rdfcanon.rdfcanon_work_budget import RDFCanonLimitExceeded
+
+        canon = self.canon
+        work = canon.work
+        budget = canon.budget
+
+        chunks: list[list] = [None] * len(self.futures)
+        try:
+            for future in completed(canon, self.futures):
+                canon.tick()
+                results, counters = future.result()
+                for result in results:
+                    result.issuer = result.issuer.relabel(self.component)
+                chunks[self.futures[future]] = results
+
+                work.ticks += counters["ticks"]
+                work.n_degree_calls += counters["n_degree_calls"]
+                work.permutations += counters["permutations"]
+                work.permutations_pruned += counters["permutations_pruned"]
+                work.n_degree_cache_hits += counters["n_degree_cache_hits"]
+                work.n_degree_cache_misses += counters["n_degree_cache_misses"]
+                canon.digest.bytes_hashed += counters["bytes_hashed"]
+                work.max_recursion_depth = max(
+                    work.max_recursion_depth, counters["max_recursion_depth"]
+                )
+        finally:
+            self.cancel()
+
+        if (
+            budget.max_n_degree_calls is not None
+            and work.n_degree_calls > budget.max_n_degree_calls
+        ):
+            raise RDFCanonLimitExceeded(
+                "max_n_degree_calls", budget.max_n_degree_calls, work
+            )
+
+        return [result for results in chunks for result in results]
+
+    def cancel(self):
+        for future in self.futures:
+            future.cancel()
@@ -0,0 +1,177 @@
+from array import array
+from rdflib.term import BNode, Node
+from rdfcanon.nquads_serializer import serialize_term
+
+
+# Non-blank terms are interned as their canonical N-Quads text and referenced by
+# non-negative ids (0 is the default graph). Blank nodes are numbered densely and
+# referenced as ~index, so any negative value in a row is a blank node.
+class QuadStore:
+
+    DEFAULT_GRAPH = 0
+
+    def __init__(self):
+        self.terms: list[str] = [""]
+        self.term_ids: dict[str, int] = {"": self.DEFAULT_GRAPH}
+        self.blank_labels: list[str] = []
+        self.blank_ids: dict[str, int] = dict()
+        self.blank_quads: list[array] = []
+        self.blank_rows: set[tuple[int, int, int, int]] = set()
+        self.quads = array("q")
+
+    def __len__(self) -> int:
+        return len(self.quads) >> 2
+
+    @property
+    def blank_count(self) -> int:
+        return len(self.blank_labels)
+
+    def intern_term(self, text: str) -> int:
+        id = self.term_ids.get(text)
+        if id is None:
+            id = len(self.terms)
+            self.terms.append(text)
+            self.term_ids[text] = id
+        return id
+
+    def intern_blank(self, label: str) -> int:
+        index = self.blank_ids.get(label)
+        if index is None:
+            index = len(self.blank_labels)
+            self.blank_labels.append(label)
+            self.blank_ids[label] = index
+            self.blank_quads.append(array("q"))
+        return ~index
+
+    def intern_node(self, node: Node) -> int:
+        if isinstance(node, BNode):
+            return self.intern_blank(str(node))
+        return self.intern_term(serialize_term(node))
+
+    def intern_text(self, text: str) -> int:
+        if text.startswith("_:"):
+            return self.intern_blank(text[2:])
+        return self.intern_term(text)
+
+    def add_terms(self, subject: str, predicate: str, object: str, graph: str) -> bool:
+        return self.add(
+            self.intern_text(subject),
+            self.intern_term(predicate),
+            self.intern_text(object),
+            self.intern_text(graph),
+        )
+
+    def add(self, subject: int, predicate: int, object: int, graph: int) -> bool:
+        if subject < 0 or object < 0 or graph < 0:
+            row = (subject, predicate, object, graph)
+            if row in self.blank_rows:
+                return False
+            self.blank_rows.add(row)
+
+            quad_index = len(self)
+            for node in {subject, object, graph}:
+                if node < 0:
+                    self.blank_quads[~node].append(quad_index)
+
+        self.quads.extend((subject, predicate, object, graph))
+        return True
+
+    def remove(self, subject: int, predicate: int, object: int, graph: int) -> bool:
+        # The last row is moved into the freed slot, so rows stay dense. Blank nodes
+        # left without quads keep their index.
+        row = (subject, predicate, object, graph)
+        blanks = {node for node in (subject, object, graph) if node < 0}
+        if blanks:
+            if row not in self.blank_rows:
+                return False
+            self.blank_rows.remove(row)
+            quad_index = next(
+                i for i in self.blank_quads[~next(iter(blanks))] if self.row(i) == row
+            )
+        else:
+            quad_index = next(
+                (i for i, other in enumerate(self.rows()) if other == row), None
+            )
+            if quad_index is None:
+                return False
+
+        for node in blanks:
+            self.blank_quads[~node].remove(quad_index)
+
+        last = len(self) - 1
+        if quad_index != last:
+            moved = self.row(last)
+            self.quads[quad_index << 2 : (quad_index << 2) + 4] = array("q", moved)
+            for node in {node for node in moved if node < 0}:
+                quads = self.blank_quads[~node]
+                quads[quads.index(last)] = quad_index
+        del self.quads[last << 2 :]
+        return True
+
+    def row(self, quad_index: int) -> tuple[int, int, int, int]:
+        offset = quad_index << 2
+        return tuple(self.quads[offset : offset + 4])
+
+    def rows(self):
+        quads = self.quads
+        for offset in range(0, len(quads), 4):
+            yield quads[offset], quads[offset + 1], quads[offset + 2], quads[offset + 3]
+
+    def blank_rows_of(self, blank: int):
+        quads = self.quads
+        for quad_index in self.blank_quads[blank]:
+            offset = quad_index << 2
+            yield quads[offset], quads[offset + 1], quads[offset + 2], quads[offset + 3]
+
+    def components(self) -> list[int]:
+        # Union-find over the blank-node adjacency: quads that mention several
+        # blank nodes connect them. Returns a component id for every blank node.
+        parent = list(range(self.blank_count))
+
+        def find(x: int) -> int:
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for s, _, o, g in self.blank_rows:
+            blanks = [~x for x in (s, o, g) if x < 0]
+            root = find(blanks[0])
+            for blank in blanks[1:]:
+                other = find(blank)
+                if other != root:
+                    parent[other] = root
+
+        return [find(blank) for blank in range(len(parent))]
+
+    def subset(self, blank_ids: list[int]) -> "QuadStore":
+        # A compact store holding only the quads of blank_ids, which are renumbered
+        # 0..len(blank_ids)-1 in order. Other blank nodes keep their labels.
+        subset = QuadStore()
+        for blank_id in blank_ids:
+            subset.intern_blank(self.blank_labels[blank_id])
+
+        terms = self.terms
+        labels = self.blank_labels
+        for blank_id in blank_ids:
+            for row in self.blank_rows_of(blank_id):
+                subset.add(
+                    *(
+                        subset.intern_term(terms[x])
+                        if x >= 0
+                        else subset.intern_blank(labels[~x])
+                        for x in row
+                    )
+                )
+        return subset
+
+    def __getstate__(self):
+        return self.terms, self.blank_labels, self.blank_quads, self.quads
+
+    def __setstate__(self, state):
+        self.terms, self.blank_labels, self.blank_quads, self.quads = state
+        self.term_ids = {text: id for id, text in enumerate(self.terms)}
+        self.blank_ids = {label: index for index, label in enumerate(self.blank_labels)}
+        self.blank_rows = {
+            row for row in self.rows() if row[0] < 0 or row[2] < 0 or row[3] < 0
+        }
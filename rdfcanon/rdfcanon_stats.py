@@ -0,0 +1,78 @@
+class RDFCanonStats:
+    __slots__ = (
+        "path",
+        "phases",
+        "quads",
+        "blank_nodes",
+        "hash_first_degree_calls",
+        "first_degree_cache_hits",
+        "n_degree_calls",
+        "max_recursion_depth",
+        "permutations",
+        "permutations_pruned",
+        "n_degree_cache_hits",
+        "n_degree_cache_misses",
+        "bytes_hashed",
+        "hash_group_sizes",
+    )
+
+    def __init__(
+        self,
+        path: str = None,
+        phases: dict[str, float] = None,
+        quads: int = 0,
+        blank_nodes: int = 0,
+        hash_first_degree_calls: int = 0,
+        first_degree_cache_hits: int = 0,
+        n_degree_calls: int = 0,
+        max_recursion_depth: int = 0,
+        permutations: int = 0,
+        permutations_pruned: int = 0,
+        n_degree_cache_hits: int = 0,
+        n_degree_cache_misses: int = 0,
+        bytes_hashed: int = 0,
+        hash_group_sizes: dict[int, int] = None,
+    ):
+        # no_blank_nodes, unique_hashes, n_degree, or cached for a cache hit.
+        self.path = path
+        # Seconds per phase: load, issue_simple_ids, issue_n_degree_ids,
+        # make_canon_labels, make_canon_quads. Phases a path skips are absent.
+        self.phases = phases if phases is not None else dict()
+        self.quads = quads
+        self.blank_nodes = blank_nodes
+        self.hash_first_degree_calls = hash_first_degree_calls
+        self.first_degree_cache_hits = first_degree_cache_hits
+        self.n_degree_calls = n_degree_calls
+        self.max_recursion_depth = max_recursion_depth
+        self.permutations = permutations
+        self.permutations_pruned = permutations_pruned
+        # hash_n_degree_quads results reused; misses are counted as n_degree_calls too.
+        self.n_degree_cache_hits = n_degree_cache_hits
+        self.n_degree_cache_misses = n_degree_cache_misses
+        self.bytes_hashed = bytes_hashed
+        # First-degree hash group size -> number of groups of that size.
+        self.hash_group_sizes = hash_group_sizes if hash_group_sizes is not None else dict()
+
+    @property
+    def n_degree_cache_hit_rate(self) -> float:
+        lookups = self.n_degree_cache_hits + self.n_degree_cache_misses
+        return self.n_degree_cache_hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={v}" for k, v in self.as_dict().items())
+        return f"RDFCanonStats({fields})"
+
+
+# Subclass and override what you need; every hook is a no-op by default.
+class RDFCanonHooks:
+    def phase(self, name: str, seconds: float):
+        pass
+
+    def hash_collision(self, hash: str, blank_labels: list[str]):
+        pass
+
+    def finished(self, stats: RDFCanonStats):
+        pass
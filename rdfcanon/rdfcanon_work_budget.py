@@ -0,0 +1,106 @@
+class RDFCanonWorkCounters:
+    __slots__ = (
+        "ticks",
+        "n_degree_calls",
+        "recursion_depth",
+        "max_recursion_depth",
+        "permutations",
+        "permutations_pruned",
+        "n_degree_cache_hits",
+        "n_degree_cache_misses",
+    )
+
+    def __init__(self):
+        self.ticks = 0
+        self.n_degree_calls = 0
+        self.recursion_depth = 0
+        self.max_recursion_depth = 0
+        self.permutations = 0
+        self.permutations_pruned = 0
+        self.n_degree_cache_hits = 0
+        self.n_degree_cache_misses = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={v}" for k, v in self.as_dict().items())
+        return f"RDFCanonWorkCounters({fields})"
+
+
+def restore_aborted(cls: type, args: tuple, state: dict) -> "RDFCanonAborted":
+    error = Exception.__new__(cls)
+    error.args = args
+    error.__dict__.update(state)
+    return error
+
+
+class RDFCanonAborted(Exception):
+    def __init__(self, message: str, counters: RDFCanonWorkCounters):
+        super().__init__(message)
+        self.counters = counters.as_dict()
+
+    def __reduce__(self):
+        # Raised in worker processes too; __init__ cannot be replayed from args.
+        return restore_aborted, (type(self), self.args, self.__dict__)
+
+
+class RDFCanonLimitExceeded(RDFCanonAborted):
+    def __init__(self, limit: str, value: int, counters: RDFCanonWorkCounters):
+        super().__init__(f"Work limit {limit}={value} exceeded", counters)
+        self.limit = limit
+        self.value = value
+
+
+class RDFCanonCancelled(RDFCanonAborted):
+    def __init__(self, counters: RDFCanonWorkCounters):
+        super().__init__("Canonicalization cancelled", counters)
+
+
+class RDFCanonCancellationToken:
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class RDFCanonEventCancellationToken(RDFCanonCancellationToken):
+    # Backed by a manager Event so a worker process sees cancel() from its parent.
+    def __init__(self, event):
+        self.event = event
+
+    @property
+    def cancelled(self) -> bool:
+        return self.event.is_set()
+
+    def cancel(self):
+        self.event.set()
+
+
+class RDFCanonWorkBudget:
+    def __init__(
+        self,
+        max_n_degree_calls: int = None,
+        max_recursion_depth: int = None,
+        max_permutations: int = None,
+        cancellation_token: RDFCanonCancellationToken = None,
+        check_interval: int = 1024,
+    ):
+        for name, value in (
+            ("max_n_degree_calls", max_n_degree_calls),
+            ("max_recursion_depth", max_recursion_depth),
+            ("max_permutations", max_permutations),
+        ):
+            if value is not None and value < 0:
+                raise ValueError(f"{name} must be non-negative")
+
+        if check_interval < 1 or check_interval & (check_interval - 1):
+            raise ValueError("check_interval must be a positive power of two")
+
+        self.max_n_degree_calls = max_n_degree_calls
+        self.max_recursion_depth = max_recursion_depth
+        # Per hash group in a single hash_n_degree_quads call.
+        self.max_permutations = max_permutations
+        self.cancellation_token = cancellation_token
+        self.check_mask = check_interval - 1
@@ -11,6 +11,11 @@ setup(
         "rdflib==7.5.0",
         "sortedcontainers==2.4.0",
     ],
+    entry_points={
+        "console_scripts": [
+            "rdfcanon=rdfcanon.cli:main",
+        ],
+    },
     long_description=long_description,
     long_description_content_type="text/markdown",
     author="YoucTagh",
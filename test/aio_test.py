@@ -0,0 +1,100 @@
+from rdfcanon import RDFCanonAsync, RDFCanonLimitExceeded, RDFCanonWorkBudget, canonize_async
+from rdfcanon.nquads_custom_parser import parse_nquads_preserve_bnodes
+from test.rdfcanon_test import SAMPLE_CASES, expected
+import asyncio
+import multiprocessing
+import threading
+import time
+import pytest
+
+
+# Takes tens of seconds to canonicalise; every blank node has the same hashes.
+CLIQUE = "".join(
+    f"_:e{i} <urn:p> _:e{j} .\n" for i in range(8) for j in range(8)
+).encode()
+
+
+@pytest.mark.parametrize("executor_type", ["thread", "process"])
+def test_canonize_async_matches_expected(executor_type: str):
+    async def main():
+        async with RDFCanonAsync(executor_type=executor_type, max_concurrency=2) as runner:
+            return await asyncio.gather(
+                *(
+                    runner.canonize(
+                        parse_nquads_preserve_bnodes("test/" + case.input)
+                        if i % 2
+                        else "test/" + case.input,
+                        hash_algorithm=case.hash_algorithm,
+                    )
+                    for i, case in enumerate(SAMPLE_CASES)
+                )
+            )
+
+    assert asyncio.run(main()) == [expected(case) for case in SAMPLE_CASES]
+
+
+def test_default_runner():
+    case = SAMPLE_CASES[0]
+    output = asyncio.run(canonize_async("test/" + case.input, case.hash_algorithm))
+    assert output == expected(case)
+
+
+@pytest.mark.parametrize("executor_type", ["thread", "process"])
+def test_timeout_stops_worker(executor_type: str):
+    async def main():
+        async with RDFCanonAsync(executor_type=executor_type, max_concurrency=1) as runner:
+            started = time.perf_counter()
+            with pytest.raises(asyncio.TimeoutError):
+                await runner.canonize(CLIQUE, timeout=0.2)
+            # The slot is only released once the worker has stopped.
+            assert runner.semaphore._value == 1
+            return time.perf_counter() - started
+
+    assert asyncio.run(main()) < 5
+
+
+def test_cancel_releases_slot_for_queued_work():
+    async def main():
+        async with RDFCanonAsync(executor_type="thread", max_concurrency=1) as runner:
+            slow = asyncio.create_task(runner.canonize(CLIQUE))
+            fast = asyncio.create_task(runner.canonize(b'_:a <urn:p> "x" .\n'))
+            await asyncio.sleep(0.2)
+            assert not fast.done()
+
+            slow.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await slow
+            return await asyncio.wait_for(fast, 5)
+
+    assert asyncio.run(main()) == '_:c14n0 <urn:p> "x" .\n'
+
+
+def test_budget_limits_apply():
+    async def main():
+        budget = RDFCanonWorkBudget(max_n_degree_calls=10)
+        async with RDFCanonAsync(executor_type="thread", budget=budget) as runner:
+            await runner.canonize(CLIQUE)
+
+    with pytest.raises(RDFCanonLimitExceeded):
+        asyncio.run(main())
+
+
+def test_manager_starts_off_the_event_loop(monkeypatch):
+    threads = []
+    manager = multiprocessing.Manager
+
+    def record_thread():
+        threads.append(threading.current_thread())
+        return manager()
+
+    monkeypatch.setattr(multiprocessing, "Manager", record_thread)
+
+    async def main():
+        async with RDFCanonAsync(executor_type="process", max_concurrency=2) as runner:
+            return await asyncio.gather(
+                *(runner.canonize(b'_:a <urn:p> "%d" .\n' % i) for i in range(3))
+            )
+
+    assert asyncio.run(main()) == ['_:c14n0 <urn:p> "%d" .\n' % i for i in range(3)]
+    assert len(threads) == 1
+    assert threads[0] is not threading.main_thread()
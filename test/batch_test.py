@@ -0,0 +1,59 @@
+from concurrent.futures import ThreadPoolExecutor
+from rdfcanon import RDFCanonBatch, canonize_many
+from rdfcanon.nquads_custom_parser import parse_nquads_preserve_bnodes
+from test.rdfcanon_test import SAMPLE_CASES, expected
+import pytest
+import sys
+
+
+# Repeated so the inputs span several batches.
+CASES = [case for case in SAMPLE_CASES if case.hash_algorithm == "sha256"] * 3
+
+
+def expected_outputs() -> list[str]:
+    return [expected(case) for case in CASES]
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_canonize_many_in_order(workers: int):
+    inputs = []
+    for i, case in enumerate(CASES):
+        if i % 2:
+            inputs.append(parse_nquads_preserve_bnodes("test/" + case.input))
+        else:
+            with open("test/" + case.input, "rb") as f:
+                inputs.append(f.read())
+
+    stats = []
+    outputs = list(
+        canonize_many(inputs, workers=workers, batch_size=5, on_batch=stats.append)
+    )
+
+    assert outputs == expected_outputs()
+    assert [s.index for s in stats] == list(range(len(stats)))
+    assert sum(s.datasets for s in stats) == len(CASES)
+    assert all(s.quads > 0 and s.datasets_per_second > 0 for s in stats)
+
+
+def test_batch_engine_reused_across_calls():
+    paths = ["test/" + case.input for case in CASES]
+
+    with RDFCanonBatch(batch_size=7) as batch:
+        assert list(batch.canonize_many(paths)) == expected_outputs()
+        assert list(batch.canonize_many(paths[:3])) == expected_outputs()[:3]
+
+    assert len(batch.batch_stats) == -(-len(paths) // 7) + 1
+
+
+def test_thread_executor_engines_are_not_shared():
+    paths = ["test/" + case.input for case in CASES] * 3
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(4) as executor:
+            batch = RDFCanonBatch(batch_size=2, executor=executor)
+            outputs = list(batch.canonize_many(paths))
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert outputs == expected_outputs() * 3
@@ -0,0 +1,47 @@
+from benchmark.generators import GENERATORS, generate
+from benchmark.runner import compare, run_case
+from rdfcanon import RDFCanon
+import copy
+import pytest
+
+
+@pytest.mark.parametrize("name", sorted(GENERATORS))
+def test_generators_produce_canonicalizable_nquads(name: str):
+    params = {
+        "chain": {"length": 5, "chains": 2},
+        "star": {"leaves": 5},
+        "clique": {"size": 3},
+        "ring": {"size": 5},
+        "ground": {"quads": 20},
+        "named_graphs": {"graphs": 3, "quads_per_graph": 2},
+        "credentials": {"documents": 2},
+    }[name]
+    data = generate(name, **params)
+    assert RDFCanon.from_nquads(data).canonize()
+
+
+@pytest.mark.parametrize("input", ["nquads", "dataset"])
+def test_run_case_reports_phases(input: str):
+    result = run_case("credentials", {"documents": 3}, input=input, repeat=1)
+
+    assert result["quads"] == 33
+    assert result["peak_memory"] > 0
+    assert result["label_copies"] == result["label_entries_copied"] == 0
+    assert set(result["seconds"]) >= {"issueSimpleIds", "issue_n_degree_ids", "total"}
+    assert compare({"results": [result]}, {"results": [result]}) == []
+
+
+def test_compare_flags_regressions():
+    old = {"results": [run_case("star", {"leaves": 10}, repeat=1)]}
+    new = copy.deepcopy(old)
+    new["results"][0]["seconds"]["total"] = old["results"][0]["seconds"]["total"] * 2 + 1
+    new["results"][0]["output_sha256"] = "0" * 64
+
+    regressions = compare(old, new)
+    assert len(regressions) == 2
+
+
+def test_label_copies_count_entries():
+    result = run_case("clique", {"size": 5}, repeat=1)
+
+    assert 0 < result["label_copies"] < result["label_entries_copied"]
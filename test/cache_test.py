@@ -0,0 +1,106 @@
+from rdfcanon import RDFCanon, RDFCanonCache, RDFCanonMemoryCache, RDFCanonSqliteCache
+from rdfcanon.cache import RDFCanonCacheEntry
+from test.rdfcanon_test import SAMPLE_CASES, expected
+from test.rdfcanon_test_case import RDFCanonTestCase
+import pytest
+
+
+INPUT = b"_:a <http://example.org/p> _:b .\n_:b <http://example.org/p> \"x\" .\n"
+RELABELLED = b"_:b <http://example.org/p> \"x\" .\n_:z <http://example.org/p> _:b .\n"
+
+
+@pytest.mark.parametrize("test_case", SAMPLE_CASES)
+def test_cache_hit_matches_expected(test_case: RDFCanonTestCase):
+    cache = RDFCanonMemoryCache()
+    for _ in range(2):
+        canon = RDFCanon.from_nquads(
+            "test/" + test_case.input, test_case.hash_algorithm, cache=cache
+        )
+        assert canon.canonize() == expected(test_case)
+
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_restores_labels():
+    cache = RDFCanonMemoryCache()
+    first = RDFCanon.from_nquads(INPUT, cache=cache)
+    output = first.canonize()
+
+    second = RDFCanon.from_nquads(INPUT, cache=cache)
+    assert second.canonize() == output
+    assert second.canon_issuer.existing == first.canon_issuer.existing
+    assert second.canon_quads == first.canon_quads
+
+
+def test_cache_key_depends_on_labels_and_algorithm():
+    cache = RDFCanonMemoryCache()
+    RDFCanon.from_nquads(INPUT, cache=cache).canonize()
+    RDFCanon.from_nquads(RELABELLED, cache=cache).canonize()
+    RDFCanon.from_nquads(INPUT, "sha384", cache=cache).canonize()
+
+    assert cache.hits == 0
+    assert cache.stats()["entries"] == 3
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = RDFCanonMemoryCache(max_entries=2)
+    inputs = [b"_:a <http://example.org/p> \"%d\" .\n" % i for i in range(3)]
+
+    RDFCanon.from_nquads(inputs[0], cache=cache).canonize()
+    RDFCanon.from_nquads(inputs[1], cache=cache).canonize()
+    RDFCanon.from_nquads(inputs[0], cache=cache).canonize()
+    RDFCanon.from_nquads(inputs[2], cache=cache).canonize()
+    RDFCanon.from_nquads(inputs[0], cache=cache).canonize()
+
+    assert cache.stats() == {
+        "hits": 2,
+        "misses": 3,
+        "evictions": 1,
+        "entries": 2,
+        "bytes": cache.size,
+    }
+
+
+def test_sqlite_cache_persists(tmp_path):
+    path = str(tmp_path / "canon.sqlite")
+
+    cache = RDFCanonSqliteCache(path)
+    output = RDFCanon.from_nquads(INPUT, cache=cache).canonize()
+    cache.close()
+
+    cache = RDFCanonSqliteCache(path, max_bytes=1 << 20)
+    assert RDFCanon.from_nquads(INPUT, cache=cache).canonize() == output
+    assert (cache.hits, cache.misses) == (1, 0)
+    cache.close()
+
+
+def test_sqlite_cache_max_bytes(tmp_path):
+    cache = RDFCanonSqliteCache(str(tmp_path / "canon.sqlite"), max_bytes=200)
+    for i in range(10):
+        RDFCanon.from_nquads(
+            b"_:a <http://example.org/p> \"%d\" .\n" % i, cache=cache
+        ).canonize()
+
+    stats = cache.stats()
+    assert stats["bytes"] <= 200
+    assert stats["evictions"] == 10 - stats["entries"]
+    cache.close()
+
+
+def test_entry_size_counts_utf8_bytes():
+    entry = RDFCanonCacheEntry('_:c14n0 <urn:p> "éé" .\n', {"é": "_:c14n0"})
+    assert entry.size() == 25 + 2 + 7
+
+
+def test_cache_backends_must_implement_storage():
+    class Incomplete(RDFCanonCache):
+        def load(self, key: str):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_cache_rejects_memory_limit():
+    with pytest.raises(ValueError):
+        RDFCanon("sha256", memory_limit=1 << 20, cache=RDFCanonMemoryCache())
@@ -0,0 +1,69 @@
+from rdfcanon import RDFCanon, RDFCanonIncremental
+from rdfcanon.nquads_reader import read_nquads
+from test.rdfcanon_test import SAMPLE_CASES, expected
+from test.rdfcanon_test_case import RDFCanonTestCase
+import hashlib
+import pytest
+
+
+def expected_bytes(test_case: RDFCanonTestCase) -> bytes:
+    return expected(test_case).encode("utf-8")
+
+
+@pytest.mark.parametrize("test_case", SAMPLE_CASES)
+def test_canonical_hash_matches_output(test_case: RDFCanonTestCase):
+    output = expected_bytes(test_case)
+
+    canon = RDFCanon.from_nquads("test/" + test_case.input, test_case.hash_algorithm)
+    assert canon.canonical_hash() == hashlib.sha256(output).hexdigest()
+    assert canon.canonical_hash("sha384") == hashlib.sha384(output).hexdigest()
+
+    with RDFCanon.from_nquads(
+        "test/" + test_case.input, test_case.hash_algorithm, memory_limit=256
+    ) as spooled:
+        assert spooled.canonical_hash() == hashlib.sha256(output).hexdigest()
+
+
+@pytest.mark.parametrize("test_case", SAMPLE_CASES)
+def test_canonical_graph_hashes(test_case: RDFCanonTestCase):
+    lines = expected(test_case).split("\n")[:-1]
+    hashers = dict()
+    for line, quad in zip(lines, read_nquads(expected_bytes(test_case))):
+        hasher = hashers.setdefault(quad[3], hashlib.sha256())
+        hasher.update(line.encode("utf-8") + b"\n")
+
+    canon = RDFCanon.from_nquads("test/" + test_case.input, test_case.hash_algorithm)
+    assert canon.canonical_graph_hashes() == {
+        graph: hasher.hexdigest() for graph, hasher in hashers.items()
+    }
+
+
+def test_update_digest_chunks_lines():
+    data = b"".join(b'<urn:s> <urn:p> "%d" .\n' % i for i in range(2500))
+    canon = RDFCanon.from_nquads(data)
+
+    chunks = []
+
+    class Sink:
+        def update(self, data: bytes):
+            chunks.append(data)
+
+    assert canon.update_digest(Sink()) == 2500
+    assert len(chunks) == 3
+    assert b"".join(chunks) == RDFCanon.from_nquads(data).canonize().encode("utf-8")
+
+
+def test_incremental_canonical_hash():
+    canon = RDFCanonIncremental.from_nquads(b"_:a <urn:p> _:b <urn:g> .\n")
+    assert canon.canonical_hash() == hashlib.sha256(canon.canonize().encode()).hexdigest()
+
+
+def test_streaming_hashes_repeat_with_memory_limit(tmp_path):
+    data = b"<urn:s> <urn:p> <urn:o> <urn:g> .\n_:a <urn:p> _:b .\n"
+    plain = RDFCanon.from_nquads(data)
+
+    with RDFCanon.from_nquads(data, memory_limit=1, temp_dir=str(tmp_path)) as canon:
+        for _ in range(2):
+            assert canon.canonical_hash() == plain.canonical_hash()
+            assert canon.update_digest(hashlib.sha256()) == 2
+            assert canon.canonical_graph_hashes() == plain.canonical_graph_hashes()
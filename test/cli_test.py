@@ -0,0 +1,80 @@
+from rdfcanon import RDFCanon
+from rdfcanon.cli import main
+import io
+import json
+import sys
+import pytest
+
+
+INPUT = "test/rdfc10/test044-in.nq"
+EXPECTED = "test/rdfc10/test044-rdfc10.nq"
+INPUTS = [INPUT, "test/rdfc10/test001-in.nq", "test/rdfc10/test020-in.nq"]
+
+
+def read(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def test_stdin_to_stdout(monkeypatch, capsys):
+    with open(INPUT, "rb") as f:
+        monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(f.read())))
+
+    assert main([]) == 0
+    assert capsys.readouterr().out == read(EXPECTED)
+
+
+def test_labels_and_stats(capsys):
+    assert main([INPUT, "--output", "labels", "--stats"]) == 0
+    out, err = capsys.readouterr()
+    assert json.loads(out) == RDFCanon.from_nquads(INPUT).canonical_labels()
+    stats = json.loads(err)
+    assert stats["input"] == INPUT
+    assert stats["path"] == "n_degree"
+    assert stats["seconds"] > 0
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_hashes_of_many_files_in_order(jobs: str, capsys):
+    assert main(["--output", "hash", "--jobs", jobs, *INPUTS]) == 0
+    lines = capsys.readouterr().out.split("\n")[:-1]
+    assert lines == [
+        f"{RDFCanon.from_nquads(path).canonical_hash()}  {path}" for path in INPUTS
+    ]
+
+
+def test_output_dir(tmp_path):
+    assert main(["-j", "2", "-d", str(tmp_path), *INPUTS]) == 0
+    for path in INPUTS:
+        name = path.split("/")[-1]
+        assert read(str(tmp_path / (name + ".c14n.nq"))) == read(
+            path.replace("-in.nq", "-rdfc10.nq")
+        )
+
+
+def test_errors_are_reported_per_input(tmp_path, capsys):
+    bad = tmp_path / "bad.nq"
+    bad.write_text("<urn:s> <urn:p> .\n")
+
+    assert main(["--output", "hash", str(bad), INPUT]) == 1
+    out, err = capsys.readouterr()
+    assert out.endswith(f"  {INPUT}\n")
+    assert err.startswith(f"rdfcanon: {bad}: ")
+
+
+def test_several_inputs_need_output_dir():
+    with pytest.raises(SystemExit):
+        main(INPUTS)
+
+
+def test_output_dir_rejects_clashing_names(tmp_path, capsys):
+    other = tmp_path / "other"
+    other.mkdir()
+    (other / "test044-in.nq").write_text(read(INPUT))
+    out_dir = tmp_path / "out"
+
+    with pytest.raises(SystemExit):
+        main(["-d", str(out_dir), INPUT, str(other / "test044-in.nq")])
+
+    assert "would both be written to" in capsys.readouterr().err
+    assert not out_dir.exists()
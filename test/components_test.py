@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor
+from rdfcanon.main import RDFCanon
+from rdfcanon.rdfcanon_time_ticker import RDFCanonTimeTicker
+from test.rdfcanon_test import EVAL_CASES, expected
+from test.rdfcanon_test_case import RDFCanonTestCase
+import pytest
+
+
+def clusters(count: int) -> bytes:
+    # Disconnected copies of symmetric shapes: twin cycles and small cliques.
+    lines = []
+    for c in range(count):
+        for i in range(3):
+            lines.append(f"_:r{c}x{i} <urn:ex:next> _:r{c}x{(i + 1) % 3} .")
+            lines.append(f"_:r{c}y{i} <urn:ex:next> _:r{c}y{(i + 1) % 3} .")
+            for j in range(3):
+                if i != j:
+                    lines.append(f"_:k{c}n{i} <urn:ex:knows> _:k{c}n{j} _:g{c} .")
+        lines.append(f'_:g{c} <urn:ex:label> "cluster {c % 3}" .')
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def canonize_by_component(canon: RDFCanon, monkeypatch) -> str:
+    monkeypatch.setattr(RDFCanon, "PARALLEL_MIN_HASH_GROUP", 2)
+    with ThreadPoolExecutor(2) as executor:
+        canon.executor = executor
+        return canon.canonize()
+
+
+# Equivalence with the monolithic run is checked on the whole suite, not a sample.
+@pytest.mark.parametrize("test_case", EVAL_CASES)
+def test_component_run_matches_monolithic_run(test_case: RDFCanonTestCase, monkeypatch):
+    def canon() -> RDFCanon:
+        return RDFCanon.from_nquads(
+            "test/" + test_case.input,
+            hash_algorithm=test_case.hash_algorithm,
+            ticker=RDFCanonTimeTicker(30000),
+        )
+
+    monolithic = canon()
+    assert monolithic.canonize() == expected(test_case)
+
+    by_component = canon()
+    assert canonize_by_component(by_component, monkeypatch) == expected(test_case)
+    assert by_component.canon_issuer.existing == monolithic.canon_issuer.existing
+
+
+def test_disconnected_clusters(monkeypatch):
+    data = clusters(6)
+
+    monolithic = RDFCanon.from_nquads(data).canonize()
+
+    canon = RDFCanon.from_nquads(data)
+    assert len(set(canon.store.components())) == 6 * 3
+    assert canonize_by_component(canon, monkeypatch) == monolithic
+    assert len(set(canon.component_of)) == 6 * 3
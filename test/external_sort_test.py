@@ -0,0 +1,65 @@
+import os
+from rdfcanon.external_sort import ExternalSorter
+from rdfcanon.main import RDFCanon
+from rdfcanon.nquads_custom_parser import parse_nquads_preserve_bnodes
+from rdfcanon.rdfcanon_time_ticker import RDFCanonTimeTicker
+from test.rdfcanon_test import SAMPLE_CASES, expected
+from test.rdfcanon_test_case import RDFCanonTestCase
+import pytest
+
+
+@pytest.mark.parametrize("test_case", SAMPLE_CASES)
+def test_out_of_core_case(test_case: RDFCanonTestCase, tmp_path):
+    with RDFCanon.from_nquads(
+        "test/" + test_case.input,
+        hash_algorithm=test_case.hash_algorithm,
+        ticker=RDFCanonTimeTicker(3000),
+        memory_limit=256,
+        temp_dir=str(tmp_path),
+    ) as canon:
+        output = tmp_path / "out.nq"
+        canon.canonize_to(output)
+
+        assert output.read_text(encoding="utf-8") == expected(test_case)
+
+    assert os.listdir(tmp_path) == ["out.nq"]
+
+    with RDFCanon(
+        hash_algorithm=test_case.hash_algorithm,
+        dataset=parse_nquads_preserve_bnodes("test/" + test_case.input),
+        ticker=RDFCanonTimeTicker(3000),
+        memory_limit=256,
+        temp_dir=str(tmp_path),
+    ) as canon:
+        assert canon.canonize() == expected(test_case)
+
+
+def test_external_sorter_merges_runs(tmp_path):
+    lines = [f"line {i % 97:03d}" for i in range(1000)]
+
+    with ExternalSorter(memory_limit=512, temp_dir=str(tmp_path)) as sorter:
+        sorter.MAX_FAN_IN = 4
+        sorter.extend(lines)
+
+        assert len(sorter.runs) > 0
+        assert list(sorter) == sorted(set(lines))
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_spooled_output_can_be_read_twice(tmp_path):
+    data = b"<urn:s> <urn:p> <urn:o> .\n_:a <urn:p> _:b .\n"
+    expected = "<urn:s> <urn:p> <urn:o> .\n_:c14n1 <urn:p> _:c14n0 .\n"
+
+    canon = RDFCanon.from_nquads(data, memory_limit=1, temp_dir=str(tmp_path))
+    canon.canonical_hash()
+
+    assert canon.canonize() == expected
+    assert canon.canonize() == expected
+    assert list(canon.iter_canonical_quads()) == expected.split("\n")[:-1]
+
+    canon.close()
+
+    assert os.listdir(tmp_path) == []
+    with pytest.raises(ValueError):
+        canon.canonize()
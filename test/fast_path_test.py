@@ -0,0 +1,43 @@
+from rdfcanon import RDFCanon, RDFCanonIncremental, RDFCanonMemoryCache
+
+
+GROUND = b'<urn:b> <urn:p> "x" .\n<urn:a> <urn:p> <urn:b> <urn:g> .\n'
+UNIQUE = b'_:a <urn:p> "x" .\n_:b <urn:p> "y" .\n_:a <urn:q> _:b .\n'
+CYCLE = b"_:a <urn:p> _:b .\n_:b <urn:p> _:a .\n"
+
+
+def test_no_blank_nodes_path():
+    canon = RDFCanon.from_nquads(GROUND)
+    assert canon.canonize() == '<urn:a> <urn:p> <urn:b> <urn:g> .\n<urn:b> <urn:p> "x" .\n'
+    assert canon.stats().path == "no_blank_nodes"
+    assert canon.stats().hash_first_degree_calls == 0
+
+
+def test_unique_hashes_path():
+    canon = RDFCanon.from_nquads(UNIQUE)
+    canon.canonize()
+    assert canon.stats().path == "unique_hashes"
+    assert canon.work.n_degree_calls == 0
+    assert len(canon.canon_issuer.existing) == 2
+
+
+def test_n_degree_and_cached_paths():
+    cache = RDFCanonMemoryCache()
+    canon = RDFCanon.from_nquads(CYCLE, cache=cache)
+    canon.canonize()
+    assert canon.stats().path == "n_degree"
+
+    canon = RDFCanon.from_nquads(CYCLE, cache=cache)
+    canon.canonize()
+    assert canon.stats().path == "cached"
+
+
+def test_incremental_path_follows_updates():
+    canon = RDFCanonIncremental.from_nquads(UNIQUE)
+    canon.canonize()
+    assert canon.stats().path == "unique_hashes"
+
+    canon.add_terms("_:c", "<urn:q>", "_:d", "")
+    canon.add_terms("_:d", "<urn:q>", "_:c", "")
+    canon.canonize()
+    assert canon.stats().path == "n_degree"
@@ -0,0 +1,21 @@
+from rdfcanon.main import RDFCanon
+from rdfcanon.nquads_custom_parser import parse_nquads_preserve_bnodes
+from rdfcanon.rdfcanon_time_ticker import RDFCanonTimeTicker
+from test.rdfcanon_test import SAMPLE_CASES
+from test.rdfcanon_test_case import RDFCanonTestCase
+import pytest
+
+
+@pytest.mark.parametrize("test_case", SAMPLE_CASES)
+def test_first_degree_hash_computed_once(test_case: RDFCanonTestCase):
+    dataset = parse_nquads_preserve_bnodes("test/" + test_case.input)
+
+    canon = RDFCanon(
+        hash_algorithm=test_case.hash_algorithm,
+        dataset=dataset,
+        ticker=RDFCanonTimeTicker(3000),
+    )
+    canon.canonize()
+
+    assert canon.first_degree_cache_misses == len(canon.first_degree_hashes)
+    assert canon.first_degree_cache_misses <= canon.store.blank_count
@@ -0,0 +1,23 @@
+from rdfcanon.hash_wrapper import HashWrapper
+import hashlib
+import pytest
+
+
+@pytest.mark.parametrize("algo", ["sha256", "sha384"])
+def test_prefix_reuse_matches_plain_hash(algo: str):
+    digest = HashWrapper(algo)
+    prefix = digest.prefix(b"s<http://example.org/p>")
+
+    for label in (b"_:c14n0", b"_:b1", b"e3b0c442"):
+        expected = hashlib.new(algo, b"s<http://example.org/p>" + label).hexdigest()
+        assert digest.hexdigest_of(label, prefix) == expected
+    assert digest.hexdigest_of(b"abc") == hashlib.new(algo, b"abc").hexdigest()
+    assert digest.bytes_hashed == 23 + 7 + 4 + 8 + 3
+
+
+def test_reset_starts_from_empty():
+    digest = HashWrapper()
+    digest.update(b"abc")
+    digest.reset()
+    digest.update(b"xyz")
+    assert digest.hexdigest() == hashlib.sha256(b"xyz").hexdigest()
@@ -0,0 +1,52 @@
+from rdfcanon.identifier_issuer import IdentifierIssuer
+
+
+def test_copies_share_labels_until_written():
+    issuer = IdentifierIssuer("_:b")
+    issuer.get_id("a")
+    issuer.get_id("b")
+
+    copy = issuer.copy()
+    assert copy.existing is issuer.existing
+    assert copy.get_id("a") == "_:b0"
+    assert copy.existing is issuer.existing
+
+    assert copy.get_id("c") == "_:b2"
+    issuer.revoke("b")
+    assert issuer.get_id("d") == "_:b1"
+
+    assert copy.existing == {"a": "_:b0", "b": "_:b1", "c": "_:b2"}
+    assert issuer.existing == {"a": "_:b0", "d": "_:b1"}
+    assert (copy.counter, issuer.counter) == (3, 2)
+
+
+def test_copy_of_copy_is_independent():
+    issuer = IdentifierIssuer("_:b")
+    issuer.get_id("a")
+    first = issuer.copy()
+    second = first.copy()
+
+    second.get_id("b")
+    first.revoke("a")
+    assert issuer.existing == {"a": "_:b0"}
+    assert first.existing == {}
+    assert second.existing == {"a": "_:b0", "b": "_:b1"}
+
+
+def test_dropped_copies_release_the_label_map():
+    issuer = IdentifierIssuer("_:b")
+    issuer.get_id("a")
+    existing = issuer.existing
+
+    copy = issuer.copy()
+    copy.copy()
+    del copy
+
+    issuer.get_id("b")
+    assert issuer.existing is existing
+    assert issuer.owners is None
+
+    kept = issuer.copy()
+    issuer.revoke("b")
+    assert issuer.existing is not existing
+    assert kept.existing == {"a": "_:b0", "b": "_:b1"}
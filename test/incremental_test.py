@@ -0,0 +1,86 @@
+from rdflib import Literal, URIRef
+from rdflib.term import BNode
+from rdfcanon import RDFCanon, RDFCanonIncremental
+from rdfcanon.nquads_reader import read_nquads
+from test.rdfcanon_test import SAMPLE_CASES, expected
+from test.rdfcanon_test_case import RDFCanonTestCase
+import random
+import pytest
+
+
+TWO_CYCLES = b"""_:a <urn:p> _:b .
+_:b <urn:p> _:a .
+_:c <urn:q> _:d .
+_:d <urn:q> _:c .
+"""
+
+
+@pytest.mark.parametrize("test_case", SAMPLE_CASES)
+def test_incremental_matches_expected(test_case: RDFCanonTestCase):
+    canon = RDFCanonIncremental(test_case.hash_algorithm)
+    quads = list(read_nquads("test/" + test_case.input))
+    half = len(quads) // 2
+    for quad in quads[:half]:
+        canon.add_terms(*quad)
+    canon.canonize()
+    for quad in quads[half:]:
+        canon.add_terms(*quad)
+
+    assert canon.canonize() == expected(test_case)
+
+
+def test_incremental_random_updates_match_full_run():
+    quads = list(read_nquads("test/rdfc10/test044-in.nq"))
+    rng = random.Random(7)
+    canon = RDFCanonIncremental()
+    present = set()
+    previous = set()
+
+    for _ in range(40):
+        quad = rng.choice(quads)
+        if quad in present:
+            assert canon.remove_terms(*quad)
+            present.remove(quad)
+        else:
+            assert canon.add_terms(*quad)
+            present.add(quad)
+
+        full = RDFCanon("sha256")
+        for other in present:
+            full.store.add_terms(*other)
+        output = full.canonize()
+        assert canon.canonize() == output
+
+        current = set(output.split("\n")[:-1])
+        removed, added = canon.canonical_diff()
+        assert removed == sorted(previous - current)
+        assert added == sorted(current - previous)
+        previous = current
+
+
+def test_incremental_reuses_untouched_components():
+    canon = RDFCanonIncremental.from_nquads(TWO_CYCLES)
+    canon.canonize()
+    assert canon.work.n_degree_calls > 0
+
+    canon.add_terms("_:c", "<urn:r>", '"x"', "")
+    canon.canonize()
+    assert canon.work.n_degree_calls == 0
+    assert canon.n_degree_reused == 2
+
+
+def test_incremental_rdflib_terms_and_diff():
+    canon = RDFCanonIncremental.from_nquads(TWO_CYCLES)
+    canon.canonical_diff()
+
+    ground = (URIRef("urn:s"), URIRef("urn:p"), Literal("v"))
+    canon.update(added=[ground, (BNode("a"), URIRef("urn:r"), Literal("x"))])
+    assert not canon.add(ground)
+
+    removed, added = canon.canonical_diff()
+    assert '<urn:s> <urn:p> "v" .' in added
+    assert len(added) - len(removed) == 2
+
+    canon.update(removed=[ground, (BNode("a"), URIRef("urn:r"), Literal("x"))])
+    assert not canon.remove(ground)
+    assert canon.canonize() == RDFCanon.from_nquads(TWO_CYCLES).canonize()
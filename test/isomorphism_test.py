@@ -0,0 +1,45 @@
+from rdfcanon import RDFCanonLimitExceeded, RDFCanonWorkBudget, isomorphic
+from rdfcanon.nquads_custom_parser import parse_nquads_preserve_bnodes
+from test.rdfcanon_test import SAMPLE_CASES
+from test.rdfcanon_test_case import RDFCanonTestCase
+import pytest
+
+
+TWO_TRIANGLES = b"".join(
+    b"_:%s <urn:p> _:%s .\n" % pair
+    for pair in [(b"a", b"b"), (b"b", b"c"), (b"c", b"a"), (b"d", b"e"), (b"e", b"f"), (b"f", b"d")]
+)
+HEXAGON = b"".join(
+    b"_:n%d <urn:p> _:n%d .\n" % (i, (i + 1) % 6) for i in range(6)
+)
+
+
+@pytest.mark.parametrize("test_case", SAMPLE_CASES)
+def test_input_is_isomorphic_to_canonical_form(test_case: RDFCanonTestCase):
+    dataset = parse_nquads_preserve_bnodes("test/" + test_case.input)
+    assert isomorphic(dataset, "test/" + test_case.expected, test_case.hash_algorithm)
+
+
+def test_relabelled_graph_is_isomorphic():
+    relabelled = TWO_TRIANGLES.replace(b"_:a", b"_:x").replace(b"_:d", b"_:a")
+    assert isomorphic(TWO_TRIANGLES, relabelled)
+
+
+@pytest.mark.parametrize(
+    "other",
+    [
+        TWO_TRIANGLES + b"<urn:s> <urn:p> \"extra\" .\n",
+        TWO_TRIANGLES.replace(b"_:f <urn:p> _:d", b"_:f <urn:q> _:d"),
+        TWO_TRIANGLES.replace(b"_:f <urn:p> _:d", b"_:f <urn:p> _:g"),
+    ],
+)
+def test_cheap_mismatches_skip_n_degree_hashing(other: bytes):
+    budget = RDFCanonWorkBudget(max_n_degree_calls=0)
+    assert not isomorphic(TWO_TRIANGLES, other, budget=budget)
+
+
+def test_structural_mismatch_needs_n_degree_hashing():
+    # Same counts and first-degree hashes; only the n-degree phase tells them apart.
+    assert not isomorphic(TWO_TRIANGLES, HEXAGON)
+    with pytest.raises(RDFCanonLimitExceeded):
+        isomorphic(TWO_TRIANGLES, HEXAGON, budget=RDFCanonWorkBudget(max_n_degree_calls=0))
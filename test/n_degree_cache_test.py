@@ -0,0 +1,45 @@
+from benchmark.generators import generate
+from rdfcanon import RDFCanon
+from test.rdfcanon_test import SAMPLE_CASES, expected
+from test.rdfcanon_test_case import RDFCanonTestCase
+import pytest
+
+
+class AlwaysCached(RDFCanon):
+    N_DEGREE_CACHE_PROBE = 1 << 62
+
+
+class SmallCache(AlwaysCached):
+    N_DEGREE_CACHE_SIZE = 4
+
+
+@pytest.mark.parametrize("test_case", SAMPLE_CASES)
+def test_cached_results_match_expected(test_case: RDFCanonTestCase):
+    canon = SmallCache.from_nquads("test/" + test_case.input, test_case.hash_algorithm)
+    assert canon.canonize() == expected(test_case)
+    assert len(canon.n_degree_cache) <= 4
+
+
+def test_cache_hits_replace_n_degree_calls():
+    plain = RDFCanon.from_nquads("test/rdfc10/test044-in.nq")
+    plain.canonize()
+    canon = AlwaysCached.from_nquads("test/rdfc10/test044-in.nq")
+    assert canon.canonize() == plain.canonize()
+
+    stats = canon.stats()
+    assert stats.n_degree_cache_hits > 0
+    # Top-level calls are never looked up.
+    assert stats.n_degree_cache_misses < stats.n_degree_calls
+    assert stats.n_degree_calls < plain.stats().n_degree_calls
+    assert 0 < stats.n_degree_cache_hit_rate < 1
+
+
+def test_cache_switches_off_without_hits():
+    canon = RDFCanon.from_nquads(generate("ring", size=30, rings=2))
+    canon.canonize()
+
+    stats = canon.stats()
+    assert canon.n_degree_cache is None
+    assert stats.n_degree_cache_hits == 0
+    assert RDFCanon.N_DEGREE_CACHE_PROBE <= stats.n_degree_cache_misses < stats.n_degree_calls
+    assert stats.n_degree_cache_hit_rate == 0.0
@@ -0,0 +1,62 @@
+import io
+from rdfcanon.main import RDFCanon
+from rdfcanon.nquads_reader import NQuadsSyntaxError, read_nquads
+from rdfcanon.rdfcanon_time_ticker import RDFCanonTimeTicker
+from test.rdfcanon_test import SAMPLE_CASES, expected
+from test.rdfcanon_test_case import RDFCanonTestCase
+import pytest
+
+
+@pytest.mark.parametrize("test_case", SAMPLE_CASES)
+def test_from_nquads_case(test_case: RDFCanonTestCase):
+    canon = RDFCanon.from_nquads(
+        "test/" + test_case.input,
+        hash_algorithm=test_case.hash_algorithm,
+        ticker=RDFCanonTimeTicker(3000),
+    )
+    assert canon.canonize() == expected(test_case)
+
+
+def test_from_nquads_sources():
+    with open("test/rdfc10/test017-in.nq", "rb") as f:
+        data = f.read()
+
+    with open("test/rdfc10/test017-rdfc10.nq", "r", encoding="utf-8") as f:
+        expected = f.read()
+
+    for source in (data, io.BytesIO(data), io.StringIO(data.decode("utf-8"))):
+        canon = RDFCanon.from_nquads(source, ticker=RDFCanonTimeTicker(3000))
+        assert canon.canonize() == expected
+
+
+def test_read_nquads_terms():
+    data = (
+        b'# comment\n'
+        b'\n'
+        b'_:b0 <urn:ex:\\u0064> "1.0E0"^^<urn:ex:t> _:g . # trailing\n'
+        b'<urn:s> <urn:p> "a\\tb\\u0001"@en-US .\n'
+        b'<urn:s> <urn:p> _:b0.\n'
+    )
+
+    assert list(read_nquads(data)) == [
+        ("_:b0", "<urn:ex:d>", '"1.0E0"^^<urn:ex:t>', "_:g"),
+        ("<urn:s>", "<urn:p>", '"a\\tb\\u0001"@en-US', ""),
+        ("<urn:s>", "<urn:p>", "_:b0", ""),
+    ]
+
+
+def test_duplicate_quads_are_merged():
+    data = b"<urn:s> <urn:p> <urn:o> .\n" * 2 + b"_:b <urn:p> <urn:o> .\n" * 2
+
+    canon = RDFCanon.from_nquads(data, ticker=RDFCanonTimeTicker(3000))
+
+    assert canon.canonize() == (
+        "<urn:s> <urn:p> <urn:o> .\n_:c14n0 <urn:p> <urn:o> .\n"
+    )
+
+
+def test_read_nquads_syntax_error():
+    with pytest.raises(NQuadsSyntaxError) as e:
+        list(read_nquads(b"<urn:s> <urn:p> <urn:o> .\n<urn:s> <urn:p> .\n"))
+
+    assert e.value.line_number == 2
@@ -0,0 +1,92 @@
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from rdfcanon.main import RDFCanon
+from rdfcanon.rdfcanon_work_budget import (
+    RDFCanonCancellationToken,
+    RDFCanonCancelled,
+    RDFCanonLimitExceeded,
+    RDFCanonWorkBudget,
+)
+from rdfcanon.rdfcanon_time_ticker import RDFCanonTimeTicker
+from test.rdfcanon_test import SAMPLE_CASES, expected
+from test.rdfcanon_test_case import RDFCanonTestCase
+import pytest
+
+
+@pytest.fixture(scope="module")
+def executor():
+    with ProcessPoolExecutor(2) as executor:
+        yield executor
+
+
+@pytest.mark.parametrize("test_case", SAMPLE_CASES)
+def test_parallel_case(test_case: RDFCanonTestCase, executor, monkeypatch):
+    monkeypatch.setattr(RDFCanon, "PARALLEL_MIN_BLANK_NODES", 0)
+    monkeypatch.setattr(RDFCanon, "PARALLEL_MIN_HASH_GROUP", 2)
+
+    canon = RDFCanon.from_nquads(
+        "test/" + test_case.input,
+        hash_algorithm=test_case.hash_algorithm,
+        ticker=RDFCanonTimeTicker(30000),
+        workers=2,
+        executor=executor,
+    )
+    assert canon.canonize() == expected(test_case)
+
+
+@pytest.mark.parametrize("executor_type", ["process", "thread"])
+def test_owned_pool_is_shut_down(executor_type: str, monkeypatch):
+    monkeypatch.setattr(RDFCanon, "PARALLEL_MIN_BLANK_NODES", 0)
+    monkeypatch.setattr(RDFCanon, "PARALLEL_MIN_HASH_GROUP", 2)
+
+    canon = RDFCanon.from_nquads(
+        "test/rdfc10/test044-in.nq", workers=2, executor_type=executor_type
+    )
+
+    with open("test/rdfc10/test044-rdfc10.nq", "r", encoding="utf-8") as f:
+        assert canon.canonize() == f.read()
+
+    assert canon.executor is None
+    assert canon.work.n_degree_calls > 0
+
+
+def test_cancel_reaches_process_workers(monkeypatch):
+    monkeypatch.setattr(RDFCanon, "PARALLEL_MIN_BLANK_NODES", 0)
+    monkeypatch.setattr(RDFCanon, "PARALLEL_MIN_HASH_GROUP", 2)
+    token = RDFCanonCancellationToken()
+
+    with ProcessPoolExecutor(2) as executor:
+        canon = RDFCanon.from_nquads(
+            "test/rdfc10/test074-in.nq",
+            budget=RDFCanonWorkBudget(cancellation_token=token, check_interval=16),
+            workers=2,
+            executor=executor,
+        )
+        timer = threading.Timer(0.5, token.cancel)
+        timer.start()
+        started = time.perf_counter()
+        with pytest.raises(RDFCanonCancelled):
+            canon.canonize()
+        timer.join()
+
+        # Both workers gave up the poison graph, so new work starts right away.
+        assert executor.submit(sum, [1, 2]).result(timeout=10) == 3
+        assert time.perf_counter() - started < 10
+
+
+def test_worker_limit_exceeded(executor, monkeypatch):
+    monkeypatch.setattr(RDFCanon, "PARALLEL_MIN_BLANK_NODES", 0)
+    monkeypatch.setattr(RDFCanon, "PARALLEL_MIN_HASH_GROUP", 2)
+
+    canon = RDFCanon.from_nquads(
+        "test/rdfc10/test074-in.nq",
+        budget=RDFCanonWorkBudget(max_permutations=100),
+        workers=2,
+        executor=executor,
+    )
+    with pytest.raises(RDFCanonLimitExceeded) as e:
+        canon.canonize()
+
+    assert e.value.limit == "max_permutations"
+    assert e.value.counters["permutations"] > 0
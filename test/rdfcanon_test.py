@@ -25,6 +25,26 @@ def read_manifest(verbose: bool = False) -> list[RDFCanonTestCase]:
     return test_cases
 
 
+EVAL_CASES = [
+    case
+    for case in read_manifest()
+    if case.type == RDFCanonTestCase.Type.RDFC10EvalTest
+]
+
+# Feature tests run these instead of the whole manifest: each labelling path, named
+# graphs, a large n-degree search and SHA-384.
+SAMPLE_CASES = [
+    case
+    for case in EVAL_CASES
+    if case.id in ("#test002c", "#test020c", "#test036c", "#test044c", "#test054c", "#test075c")
+]
+
+
+def expected(test_case: RDFCanonTestCase) -> str:
+    with open("test/" + test_case.expected, "r", encoding="utf-8") as f:
+        return f.read()
+
+
 @pytest.mark.parametrize("test_case", read_manifest())
 def test_one_case(test_case: RDFCanonTestCase):
 
@@ -0,0 +1,71 @@
+from rdfcanon import RDFCanon, RDFCanonIncremental, RDFCanonMemoryCache
+from rdfcanon.batch import dataset_terms
+from rdfcanon.nquads_custom_parser import parse_nquads_preserve_bnodes
+from rdfcanon.nquads_serializer import serialize_quad
+from test.rdfcanon_test import SAMPLE_CASES, expected
+from test.rdfcanon_test_case import RDFCanonTestCase
+import pytest
+
+
+def quad_lines(dataset) -> list[str]:
+    # The dataset written out as is, without canonicalizing it again.
+    return sorted({serialize_quad(*terms) + "\n" for terms in dataset_terms(dataset)})
+
+
+def expected_lines(test_case: RDFCanonTestCase) -> list[str]:
+    return sorted({line + "\n" for line in expected(test_case).split("\n")[:-1]})
+
+
+@pytest.mark.parametrize("test_case", SAMPLE_CASES)
+def test_relabel_matches_canonical_output(test_case: RDFCanonTestCase):
+    canon = RDFCanon.from_nquads("test/" + test_case.input, test_case.hash_algorithm)
+    labels = canon.canonical_labels()
+
+    assert quad_lines(canon.relabel()) == expected_lines(test_case)
+    assert canon.canonize() == "".join(expected_lines(test_case))
+    assert canon.canon_issuer.existing == labels
+
+
+@pytest.mark.parametrize("test_case", SAMPLE_CASES)
+def test_relabel_in_place(test_case: RDFCanonTestCase):
+    dataset = parse_nquads_preserve_bnodes("test/" + test_case.input)
+
+    assert RDFCanon(test_case.hash_algorithm, dataset).relabel(in_place=True) is dataset
+    assert quad_lines(dataset) == expected_lines(test_case)
+
+
+def test_canonical_labels_skip_serialization():
+    canon = RDFCanon.from_nquads(b"_:x <urn:p> _:y .\n_:y <urn:q> \"v\" .\n")
+    assert canon.canonical_labels() == {"x": "_:c14n1", "y": "_:c14n0"}
+    assert canon.canon_quads == []
+    assert "make_canon_quads" not in canon.stats().phases
+
+
+def test_canonical_labels_from_cache():
+    cache = RDFCanonMemoryCache()
+    data = b"_:x <urn:p> _:y .\n"
+    labels = RDFCanon.from_nquads(data, cache=cache).canonical_labels()
+    RDFCanon.from_nquads(data, cache=cache).canonize()
+    assert RDFCanon.from_nquads(data, cache=cache).canonical_labels() == labels
+    assert cache.hits == 1
+
+
+def test_incremental_relabel_includes_ground_quads():
+    canon = RDFCanonIncremental.from_nquads(
+        b"_:x <urn:p> <urn:o> .\n<urn:s> <urn:p> \"v\"@en <urn:g> .\n"
+    )
+    dataset = canon.relabel()
+    assert "".join(quad_lines(dataset)) == canon.canonize()
+    with pytest.raises(ValueError):
+        canon.relabel(in_place=True)
+
+
+def test_labels_and_output_with_memory_limit(tmp_path):
+    data = b"<urn:s> <urn:p> <urn:o> .\n_:x <urn:p> _:y .\n_:y <urn:q> \"v\" .\n"
+    expected = RDFCanon.from_nquads(data).canonize()
+
+    with RDFCanon.from_nquads(data, memory_limit=1, temp_dir=str(tmp_path)) as canon:
+        assert canon.canonical_labels() == {"x": "_:c14n1", "y": "_:c14n0"}
+        assert canon.canonize() == expected
+        assert canon.canonical_hash() == RDFCanon.from_nquads(data).canonical_hash()
+        assert canon.canonical_labels() == {"x": "_:c14n1", "y": "_:c14n0"}
@@ -0,0 +1,71 @@
+from rdfcanon import RDFCanon, RDFCanonHooks, RDFCanonStats
+from test.rdfcanon_test import SAMPLE_CASES
+from test.rdfcanon_test_case import RDFCanonTestCase
+import pytest
+
+
+PHASES = {
+    "no_blank_nodes": ["load", "make_canon_labels", "make_canon_quads"],
+    "unique_hashes": ["load", "issue_simple_ids", "make_canon_labels", "make_canon_quads"],
+    "n_degree": [
+        "load",
+        "issue_simple_ids",
+        "issue_n_degree_ids",
+        "make_canon_labels",
+        "make_canon_quads",
+    ],
+}
+
+
+class RecordingHooks(RDFCanonHooks):
+    def __init__(self):
+        self.phases = []
+        self.collisions = []
+        self.stats = []
+
+    def phase(self, name: str, seconds: float):
+        self.phases.append(name)
+
+    def hash_collision(self, hash: str, blank_labels: list[str]):
+        self.collisions.append((hash, sorted(blank_labels)))
+
+    def finished(self, stats: RDFCanonStats):
+        self.stats.append(stats)
+
+
+@pytest.mark.parametrize("test_case", SAMPLE_CASES)
+def test_stats_are_consistent(test_case: RDFCanonTestCase):
+    hooks = RecordingHooks()
+    canon = RDFCanon.from_nquads(
+        "test/" + test_case.input, test_case.hash_algorithm, hooks=hooks
+    )
+    canon.canonize()
+
+    [stats] = hooks.stats
+    assert hooks.phases == PHASES[stats.path]
+    assert list(stats.phases) == PHASES[stats.path]
+    assert (stats.path == "n_degree") == any(size > 1 for size in stats.hash_group_sizes)
+    assert stats.blank_nodes == canon.store.blank_count
+    assert sum(size * count for size, count in stats.hash_group_sizes.items()) == (
+        stats.blank_nodes
+    )
+    assert stats.hash_first_degree_calls == stats.blank_nodes
+    assert stats.n_degree_calls == canon.work.n_degree_calls
+    assert (stats.bytes_hashed > 0) == (stats.blank_nodes > 0)
+    assert len(hooks.collisions) == sum(
+        count for size, count in stats.hash_group_sizes.items() if size > 1
+    )
+
+
+def test_collisions_go_to_hooks_not_stdout(capsys):
+    data = b"_:a <urn:p> _:b .\n_:b <urn:p> _:a .\n"
+    hooks = RecordingHooks()
+    RDFCanon.from_nquads(data, hooks=hooks).canonize()
+    RDFCanon.from_nquads(data).canonize()
+
+    assert capsys.readouterr().out == ""
+    assert [labels for _, labels in hooks.collisions] == [["a", "b"]]
+    stats = hooks.stats[0]
+    assert stats.hash_group_sizes == {2: 1}
+    assert stats.permutations + stats.permutations_pruned > 0
+    assert stats.as_dict()["max_recursion_depth"] == stats.max_recursion_depth
@@ -0,0 +1,82 @@
+from rdfcanon import (
+    RDFCanon,
+    RDFCanonCancellationToken,
+    RDFCanonCancelled,
+    RDFCanonLimitExceeded,
+    RDFCanonWorkBudget,
+)
+import pytest
+
+
+POISON_GRAPH = "test/rdfc10/test074-in.nq"
+
+
+@pytest.mark.parametrize(
+    "limit, value",
+    [
+        ("max_n_degree_calls", 500),
+        ("max_recursion_depth", 1),
+        ("max_permutations", 100),
+    ],
+)
+def test_poison_graph_stops_deterministically(limit: str, value: int):
+    counters = []
+
+    for _ in range(2):
+        canon = RDFCanon.from_nquads(
+            POISON_GRAPH, budget=RDFCanonWorkBudget(**{limit: value})
+        )
+
+        with pytest.raises(RDFCanonLimitExceeded) as e:
+            canon.canonize()
+
+        assert e.value.limit == limit
+        assert e.value.value == value
+        counters.append(e.value.counters)
+
+    assert counters[0] == counters[1]
+
+
+def test_limits_not_reached():
+    canon = RDFCanon.from_nquads(
+        "test/rdfc10/test044-in.nq",
+        budget=RDFCanonWorkBudget(
+            max_n_degree_calls=10000, max_recursion_depth=50, max_permutations=1000
+        ),
+    )
+
+    with open("test/rdfc10/test044-rdfc10.nq", "r", encoding="utf-8") as f:
+        assert canon.canonize() == f.read()
+
+    assert 0 < canon.work.n_degree_calls <= 10000
+    assert 0 < canon.work.max_recursion_depth <= 50
+    assert canon.work.recursion_depth == 0
+
+
+def test_cancellation():
+    token = RDFCanonCancellationToken()
+    canon = RDFCanon.from_nquads(
+        POISON_GRAPH,
+        budget=RDFCanonWorkBudget(cancellation_token=token, check_interval=16),
+    )
+
+    original_hash_n_degree_quads = canon.hash_n_degree_quads
+
+    def cancel_after_first_call(id, issuer):
+        token.cancel()
+        return original_hash_n_degree_quads(id, issuer)
+
+    canon.hash_n_degree_quads = cancel_after_first_call
+
+    with pytest.raises(RDFCanonCancelled) as e:
+        canon.canonize()
+
+    assert e.value.counters["ticks"] > 0
+
+
+def test_invalid_budget():
+    with pytest.raises(ValueError):
+        RDFCanonWorkBudget(max_n_degree_calls=-1)
+
+    with pytest.raises(ValueError):
+        RDFCanonWorkBudget(check_interval=1000)